@@ -9,13 +9,35 @@ CodeGlyph Backend API
 import os
 import time
 import threading
-from cachetools import TTLCache
+from cachetools import LRUCache
+import re
 import json
+import gzip
+import base64
+import hashlib
+import mimetypes
+import posixpath
+import struct
+import sys
 import subprocess
+import sqlite3
+import mmap
+import zlib
+import bisect
+import copy
 import uuid
-from datetime import datetime, timedelta
+import select
+import atexit
+import math
+import ctypes
+import ctypes.util
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from array import array
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from flask import Flask, jsonify, request, send_from_directory, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -28,7 +50,72 @@ except ImportError:
     OPENAI_AVAILABLE = False
     OpenAI = None
 
+# NumPy for vectorized heatmap statistics (stdlib array fallback)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+# fcntl for cross-process heatmap computation locks (POSIX only)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Brotli for precompressed static assets (gzip only otherwise)
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+    brotli = None
+
+# orjson for faster JSON responses (stdlib json otherwise)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class CodeGlyphJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider using orjson when installed, with the default
+    provider's conventions (sorted keys, Flask's fallback for dates, UUIDs
+    and dataclasses); the stdlib json module otherwise.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def encode(self, obj):
+        """Serialize to compact UTF-8 bytes, the form responses are sent in."""
+        if orjson is None:
+            return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+
+        option = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+                  | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b'\n', mimetype=self.mimetype)
+
+
 app = Flask(__name__, static_folder='static', static_url_path='')
+app.json = CodeGlyphJSONProvider(app)
 CORS(app)
 
 # Configuration
@@ -40,6 +127,16 @@ REPOS_FILE = DATA_DIR / 'repos.json'
 ICONS_DIR = Path('/app/data/icons')
 ADMIN_FILE = DATA_DIR / 'admin.json'
 SYSTEM_STATUS_FILE = DATA_DIR / 'system-status.json'
+# A status older than this (seconds) is flagged `stale`: the collector stopped
+SYSTEM_STATUS_STALE_AFTER = int(os.environ.get('SYSTEM_STATUS_STALE_AFTER', '30'))
+SYSTEM_STATUS_POLL_INTERVAL = 2  # seconds between stat() checks when inotify is unavailable
+# Metrics history (ring buffers fed by each status snapshot, see SYSTEM METRICS HISTORY)
+SYSTEM_HISTORY_ENABLED = os.environ.get('SYSTEM_HISTORY', '1') != '0'
+SYSTEM_HISTORY_FILE = DATA_DIR / 'system-history.bin'
+SYSTEM_HISTORY_SAVE_INTERVAL = int(os.environ.get('SYSTEM_HISTORY_SAVE_INTERVAL', '60'))
+HEATMAP_INDEX_DIR = DATA_DIR / 'heatmap-index'
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'json').lower()  # 'json' or 'sqlite'
+STORAGE_DB_FILE = DATA_DIR / 'codeglyph.db'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'svg', 'webp'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
 
@@ -64,13 +161,47 @@ login_attempts = {}  # {ip: {'count': int, 'blocked_until': datetime}}
 # ============================================================================
 # CACHING CONFIGURATION
 # ============================================================================
-# Heatmap cache: TTL 5 minutes, max 100 entries (repos * 2 for with/without since param)
-heatmap_cache = TTLCache(maxsize=100, ttl=300)
+# Heatmap cache: max 100 entries (repos * 2 for with/without since param).
+# Entries carry the version (ref fingerprint + day) they were computed for and
+# stay valid until the repository changes, instead of expiring on a timer.
+heatmap_cache = LRUCache(maxsize=100)
 heatmap_cache_lock = threading.Lock()
 
-# Translation cache: TTL 24 hours, max 500 entries
-translation_cache = TTLCache(maxsize=500, ttl=86400)
-translation_cache_lock = threading.Lock()
+# Heatmap entries are also shared by every worker process (and kept across
+# restarts) through a SQLite cache under DATA_DIR; 0 entries disables it
+HEATMAP_SHARED_CACHE_FILE = DATA_DIR / 'heatmap-cache.db'
+HEATMAP_SHARED_CACHE_MAX_ENTRIES = int(os.environ.get('HEATMAP_SHARED_CACHE_MAX_ENTRIES', '200'))
+HEATMAP_LOCK_DIR = DATA_DIR / 'heatmap-locks'
+
+# Stale-while-revalidate: an outdated entry last known current less than
+# this many seconds ago is served right away while one background refresh
+# runs; older ones make the request wait for fresh data (0 disables it)
+HEATMAP_MAX_STALENESS = float(os.environ.get('HEATMAP_MAX_STALENESS', '900'))
+heatmap_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='heatmap-refresh')
+
+# Global heatmap fan-out: repos are scanned concurrently, within one timeout
+HEATMAP_SCAN_WORKERS = int(os.environ.get('HEATMAP_SCAN_WORKERS', '4'))
+HEATMAP_REPO_TIMEOUT = float(os.environ.get('HEATMAP_REPO_TIMEOUT', '30'))
+# Scan repos through their commit-graph file instead of git log (commit dates)
+HEATMAP_COMMIT_GRAPH = os.environ.get('HEATMAP_COMMIT_GRAPH', '').lower() in ('1', 'true', 'yes')
+heatmap_scan_executor = ThreadPoolExecutor(max_workers=HEATMAP_SCAN_WORKERS, thread_name_prefix='heatmap-scan')
+
+# Background warm-up cadence in seconds (0 disables the warm-up thread)
+HEATMAP_WARM_INTERVAL = float(os.environ.get('HEATMAP_WARM_INTERVAL', '300'))
+
+# Translation memory: persistent SQLite cache shared by every worker process,
+# evicting the least recently used entries past the limit
+TRANSLATION_CACHE_FILE = DATA_DIR / 'translation-cache.db'
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.environ.get('TRANSLATION_CACHE_MAX_ENTRIES', '5000'))
+
+# Translations run as background jobs: 'openai' (needs OPENAI_API_KEY) or
+# 'stub' (local fake translator for development and tests)
+TRANSLATION_BACKEND = os.environ.get('TRANSLATION_BACKEND', 'openai').lower()
+TRANSLATION_WORKERS = int(os.environ.get('TRANSLATION_WORKERS', '2'))
+# Translation requests are collected for a short window and sent in batches
+TRANSLATION_BATCH_WINDOW = float(os.environ.get('TRANSLATION_BATCH_WINDOW', '0.2'))
+TRANSLATION_BATCH_SIZE = int(os.environ.get('TRANSLATION_BATCH_SIZE', '20'))
+translation_executor = ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS, thread_name_prefix='translation')
 
 # Known git repository paths (relative to GIT_REPOS_BASE)
 GIT_REPO_PATHS = [
@@ -90,48 +221,240 @@ def allowed_file(filename):
 # TRANSLATION HELPERS
 # ============================================================================
 
-def translate_text(text, source='fr', target='en'):
+LANGUAGE_NAMES = {'fr': 'French', 'en': 'English'}
+
+TRANSLATION_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS translations (
+        key TEXT PRIMARY KEY,
+        translation TEXT NOT NULL,
+        last_used REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used);
+"""
+TRANSLATION_CACHE_TOUCH_INTERVAL = 3600  # refresh last_used at most hourly per entry
+
+
+def translation_cache_key(source, target, text):
+    return hashlib.sha256(f'{source}\0{target}\0{text}'.encode('utf-8')).hexdigest()
+
+
+def translation_memory_get(source, target, text):
+    """Look a translation up in the persistent cache (None on miss or error)."""
+    key = translation_cache_key(source, target, text)
+    try:
+        conn = get_sqlite_connection(TRANSLATION_CACHE_FILE, TRANSLATION_CACHE_SCHEMA)
+        row = conn.execute('SELECT translation, last_used FROM translations WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > TRANSLATION_CACHE_TOUCH_INTERVAL:
+            conn.execute('UPDATE translations SET last_used = ? WHERE key = ?', (now, key))
+        return row[0]
+    except sqlite3.Error as e:
+        print(f"Translation cache error: {e}")
+        return None
+
+
+def translation_memory_put(source, target, text, translation):
+    """Store a translation, evicting the least recently used entries over the limit."""
+    key = translation_cache_key(source, target, text)
+    try:
+        conn = get_sqlite_connection(TRANSLATION_CACHE_FILE, TRANSLATION_CACHE_SCHEMA)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO translations (key, translation, last_used) VALUES (?, ?, ?)',
+                (key, translation, time.time())
+            )
+            trim_lru_table(conn, 'translations', TRANSLATION_CACHE_MAX_ENTRIES)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    except sqlite3.Error as e:
+        print(f"Translation cache error: {e}")
+
+
+def openai_translate(text, source, target):
+    """Translate text with OpenAI GPT-4o-mini. Raises on API errors."""
+    response = openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {
+                "role": "system",
+                "content": f"You are a translator. Translate the following text from {LANGUAGE_NAMES.get(source, source)} to {LANGUAGE_NAMES.get(target, target)}. Return only the translated text, nothing else. Keep it concise."
+            },
+            {
+                "role": "user",
+                "content": text
+            }
+        ],
+        temperature=0.3,
+        max_tokens=200
+    )
+    return response.choices[0].message.content.strip()
+
+
+def openai_translate_batch(texts, source, target):
     """
-    Translate text using OpenAI GPT-4o-mini with caching.
-    Returns the translated text, or original text if translation fails.
+    Translate several segments with one OpenAI request (a JSON array in, a JSON
+    object out). Falls back to one request per segment if the reply does not
+    split back into the same number of segments. Raises on API errors.
+    """
+    if len(texts) == 1:
+        return [openai_translate(texts[0], source, target)]
+
+    response = openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {
+                "role": "system",
+                "content": f"You are a translator. The user sends a JSON array of texts in {LANGUAGE_NAMES.get(source, source)}. Translate each of them to {LANGUAGE_NAMES.get(target, target)} and reply with a JSON object {{\"translations\": [...]}} holding the translated texts in the same order. Keep them concise."
+            },
+            {
+                "role": "user",
+                "content": json.dumps(texts, ensure_ascii=False)
+            }
+        ],
+        response_format={"type": "json_object"},
+        temperature=0.3,
+        max_tokens=200 * len(texts)
+    )
+    try:
+        translations = json.loads(response.choices[0].message.content)['translations']
+    except (ValueError, KeyError, TypeError):
+        translations = None
+
+    if (not isinstance(translations, list) or len(translations) != len(texts)
+            or not all(isinstance(t, str) for t in translations)):
+        return [openai_translate(text, source, target) for text in texts]
+    return [t.strip() for t in translations]
+
+
+def stub_translate_batch(texts, source, target):
+    """Local stand-in for the OpenAI client (TRANSLATION_BACKEND=stub)."""
+    return [f'[{target}] {text}' for text in texts]
+
+
+# Backends translate a list of segments and return the translations in order
+TRANSLATION_BACKENDS = {'openai': openai_translate_batch, 'stub': stub_translate_batch}
+
+
+def translation_enabled():
+    """Whether descriptions get translated at all."""
+    if TRANSLATION_BACKEND == 'openai':
+        return openai_client is not None
+    return TRANSLATION_BACKEND in TRANSLATION_BACKENDS
+
+
+class TranslationBatcher:
+    """
+    Collects translation requests for TRANSLATION_BATCH_WINDOW seconds (or
+    until TRANSLATION_BATCH_SIZE segments) and sends them to the backend as
+    one batch per language pair. A text already waiting or in flight is not
+    requested again: callers share its Future.
     """
-    if not openai_client or not text or not text.strip():
-        return text
 
-    if source == target:
-        return text
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}   # (source, target) -> [text, ...] not sent yet
+        self.inflight = {}  # (source, target, text) -> Future, until resolved
+        self.timer = None
+        self.stats = {'requested': 0, 'coalesced': 0, 'batches': 0, 'segments': 0}
+
+    def submit(self, text, source, target):
+        """Return a Future resolving to the translation of `text`."""
+        key = (source, target, text)
+        full_batch = None
+        with self.lock:
+            self.stats['requested'] += 1
+            future = self.inflight.get(key)
+            if future is not None:
+                self.stats['coalesced'] += 1
+                return future
+
+            future = self.inflight[key] = Future()
+            group = self.pending.setdefault((source, target), [])
+            group.append(text)
+            if len(group) >= TRANSLATION_BATCH_SIZE:
+                full_batch = self.pending.pop((source, target))
+            elif self.timer is None:
+                self.timer = threading.Timer(TRANSLATION_BATCH_WINDOW, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+        if full_batch:
+            translation_executor.submit(self.send, source, target, full_batch)
+        return future
+
+    def flush(self):
+        """Send every collected batch (timer callback)."""
+        with self.lock:
+            groups, self.pending, self.timer = self.pending, {}, None
+        for (source, target), texts in groups.items():
+            self.send(source, target, texts)
+
+    def send(self, source, target, texts):
+        """Translate one batch and resolve its Futures."""
+        with self.lock:
+            self.stats['batches'] += 1
+            self.stats['segments'] += len(texts)
+        try:
+            translations = TRANSLATION_BACKENDS[TRANSLATION_BACKEND](texts, source, target)
+            error = None
+        except Exception as e:
+            translations, error = None, e
+
+        for i, text in enumerate(texts):
+            if error is None:
+                translation_memory_put(source, target, text, translations[i])
+            with self.lock:
+                future = self.inflight.pop((source, target, text))
+            if error is None:
+                future.set_result(translations[i])
+            else:
+                future.set_exception(error)
+
+
+translation_batcher = TranslationBatcher()
+
+
+def request_translation(text, source='fr', target='en', use_cache=True):
+    """
+    Return a Future resolving to the translation of `text`: immediately for
+    empty texts and cache hits, otherwise once its batch has been translated
+    (`use_cache=False` skips the lookup, the new translation is still stored).
+    """
+    if not translation_enabled() or not text or not text.strip() or source == target:
+        future = Future()
+        future.set_result(text)
+        return future
 
     # Check cache first
-    cache_key = f"{source}:{target}:{text}"
-    with translation_cache_lock:
-        if cache_key in translation_cache:
-            return translation_cache[cache_key]
+    cached = translation_memory_get(source, target, text) if use_cache else None
+    if cached is not None:
+        future = Future()
+        future.set_result(cached)
+        return future
 
-    lang_names = {'fr': 'French', 'en': 'English'}
+    return translation_batcher.submit(text, source, target)
 
-    try:
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": f"You are a translator. Translate the following text from {lang_names.get(source, source)} to {lang_names.get(target, target)}. Return only the translated text, nothing else. Keep it concise."
-                },
-                {
-                    "role": "user",
-                    "content": text
-                }
-            ],
-            temperature=0.3,
-            max_tokens=200
-        )
-        result = response.choices[0].message.content.strip()
 
-        # Store in cache
-        with translation_cache_lock:
-            translation_cache[cache_key] = result
+def fetch_translation(text, source='fr', target='en'):
+    """
+    Translate text through the configured backend, with caching and batching.
+    Raises when the backend fails.
+    """
+    return request_translation(text, source, target).result()
 
-        return result
+
+def translate_text(text, source='fr', target='en'):
+    """
+    Translate text with caching.
+    Returns the translated text, or original text if translation fails.
+    """
+    try:
+        return fetch_translation(text, source, target)
     except Exception as e:
         print(f"Translation error: {e}")
         return text  # Return original text on error
@@ -141,6 +464,8 @@ def make_bilingual_description(description, source_lang='fr'):
     """
     Convert a single-language description to a bilingual object.
     Returns: {'fr': '...', 'en': '...'}
+    The other language is left empty when a translator is configured: it is
+    filled in by a background job (see queue_translation).
     """
     if not description:
         return {'fr': '', 'en': ''}
@@ -154,54 +479,873 @@ def make_bilingual_description(description, source_lang='fr'):
 
     # Translate to the other language
     target_lang = 'en' if source_lang == 'fr' else 'fr'
-    result[target_lang] = translate_text(description, source_lang, target_lang)
+    result[target_lang] = '' if translation_enabled() else description
 
     return result
 
 
+# ============================================================================
+# TRANSLATION JOBS
+# ============================================================================
+# Saving an entity never waits for the translation API. Its description is
+# stored with the other language empty and `translationStatus: "pending"`;
+# a job hands the text to translation_batcher and, once its batch comes back,
+# updates the stored entity ("done" or "failed"). Clients poll the entity
+# (or /api/translations/status).
+
+translation_stats = {'queued': 0, 'completed': 0, 'failed': 0, 'skipped': 0}
+translation_stats_lock = threading.Lock()
+
+
+def update_translation_stats(**deltas):
+    with translation_stats_lock:
+        for key, delta in deltas.items():
+            translation_stats[key] += delta
+
+
+def split_pending_description(description):
+    """
+    Return (source_lang, text, target_lang) for a bilingual description that
+    has only one language filled in, or None.
+    """
+    if not isinstance(description, dict):
+        return None
+    filled = [lang for lang in SUPPORTED_LANGUAGES if description.get(lang)]
+    if len(filled) != 1:
+        return None
+    source_lang = filled[0]
+    target_lang = next(lang for lang in SUPPORTED_LANGUAGES if lang != source_lang)
+    return source_lang, description[source_lang], target_lang
+
+
+def flag_pending_translation(entity):
+    """
+    Mark an entity (inside its store transaction) whose description awaits
+    translation, or clear a pending/failed status its description no longer
+    warrants (cleared, or now filled in both languages).
+    """
+    if translation_enabled() and split_pending_description(entity.get('description')):
+        entity['translationStatus'] = 'pending'
+    elif entity.get('translationStatus') in ('pending', 'failed'):
+        del entity['translationStatus']
+
+
+def queue_translation(store, entity):
+    """Submit the translation job of a saved entity flagged as pending."""
+    if entity.get('translationStatus') != 'pending':
+        return
+    update_translation_stats(queued=1)
+    translation_executor.submit(run_translation_job, store, entity['id'])
+
+
+def run_translation_job(store, item_id):
+    """Request the translation of a stored entity; it is saved when its batch completes."""
+    entity = store.get(item_id)
+    pending = split_pending_description(entity.get('description')) if entity else None
+    if pending is None or entity.get('translationStatus') != 'pending':
+        if pending is None and entity and entity.get('translationStatus') == 'pending':
+            # Left pending by an earlier run although nothing needs translating
+            with store.transaction() as data:
+                current = next((item for item in data[store.collection] if item.get('id') == item_id), None)
+                if current is not None:
+                    flag_pending_translation(current)
+        update_translation_stats(queued=-1, skipped=1)
+        return
+
+    description = entity['description']
+    source_lang, text, target_lang = pending
+
+    def done(future):
+        translated = None if future.exception() else future.result()
+        save_translations(store, [(item_id, description, target_lang, translated)])
+
+    request_translation(text, source_lang, target_lang).add_done_callback(done)
+
+
+def save_translations(store, results):
+    """
+    Write translation results to a store in one transaction. `results` holds
+    (item id, description translated, target language, translation or None
+    on failure) tuples. Results for entities deleted or edited meanwhile are
+    dropped and counted as skipped.
+    """
+    counts = {'completed': 0, 'failed': 0, 'skipped': 0}
+    try:
+        with store.transaction() as data:
+            items = {item.get('id'): item for item in data[store.collection]}
+            for item_id, description, target_lang, translated in results:
+                current = items.get(item_id)
+                # Skip entities deleted or edited meanwhile (a newer job handles them)
+                if current is None or current.get('description') != description:
+                    counts['skipped'] += 1
+                    continue
+                counts['failed' if translated is None else 'completed'] += 1
+                if translated is None:
+                    current['translationStatus'] = 'failed'
+                else:
+                    current['description'] = dict(description, **{target_lang: translated})
+                    current['translationStatus'] = 'done'
+    except Exception as e:
+        print(f"Translation job error: {e}")
+        counts = {'completed': 0, 'failed': len(results), 'skipped': 0}
+    update_translation_stats(queued=-len(results), **counts)
+
+
+def resume_pending_translations():
+    """Requeue the jobs of entities left pending by a previous run."""
+    for store in (cards_store, saas_store, repos_store):
+        try:
+            document = store.read() or {}
+        except (OSError, ValueError) as e:
+            print(f"Translation resume error: {e}")
+            continue
+        for entity in document.get(store.collection, []):
+            queue_translation(store, entity)
+
+
+def retranslate_store(store, force=False, source_lang=DEFAULT_LANGUAGE):
+    """
+    Flag the descriptions of a store for translation and return the jobs as
+    (item id, description, source, text, target) tuples. Without `force`,
+    only descriptions missing a language (or whose translation failed) are
+    selected; with it, every description is translated again from
+    `source_lang` (or the other language when that one is empty).
+    """
+    jobs = []
+    with store.transaction() as data:
+        for entity in (data or {}).get(store.collection, []):
+            description = entity.get('description')
+            pending = split_pending_description(description)
+            if pending is None and force and isinstance(description, dict):
+                other_lang = next(lang for lang in SUPPORTED_LANGUAGES if lang != source_lang)
+                if description.get(source_lang):
+                    pending = (source_lang, description[source_lang], other_lang)
+            if pending is None:
+                continue
+            entity['translationStatus'] = 'pending'
+            jobs.append((entity['id'], description) + pending)
+    return jobs
+
+
+def run_bulk_translation(store_jobs, force=False):
+    """
+    Request the translation of every queued description (bypassing the
+    translation cache when forced). Nothing blocks on the results: each store
+    is saved in one transaction once all of its translations have resolved.
+    """
+    for store, jobs in store_jobs:
+        if not jobs:
+            continue
+        futures = [request_translation(text, source_lang, target_lang, not force)
+                   for item_id, description, source_lang, text, target_lang in jobs]
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def done(future, store=store, jobs=jobs, futures=futures, remaining=remaining, lock=lock):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            results = [(item_id, description, target_lang, None if f.exception() else f.result())
+                       for (item_id, description, source_lang, text, target_lang), f in zip(jobs, futures)]
+            save_translations(store, results)
+
+        for future in futures:
+            future.add_done_callback(done)
+
+
+@app.route('/api/translations/retranslate', methods=['POST'])
+def retranslate_all():
+    """
+    (Re)translate every card, SaaS and repo description in one batched pass.
+
+    JSON body (optional):
+    - force: translate again descriptions that already have both languages
+    - source_lang: language to translate from when forcing (default 'fr')
+    """
+    if not translation_enabled():
+        return jsonify({'error': 'Traduction non configuree'}), 503
+
+    options = request.get_json(silent=True) or {}
+    source_lang = options.get('source_lang', DEFAULT_LANGUAGE)
+    if source_lang not in SUPPORTED_LANGUAGES:
+        source_lang = DEFAULT_LANGUAGE
+
+    force = bool(options.get('force'))
+    load_repos()
+    store_jobs = [(store, retranslate_store(store, force, source_lang))
+                  for store in (cards_store, saas_store, repos_store)]
+    queued = sum(len(jobs) for _, jobs in store_jobs)
+    update_translation_stats(queued=queued)
+    translation_executor.submit(run_bulk_translation, store_jobs, force)
+
+    return jsonify({
+        'queued': queued,
+        'cards': len(store_jobs[0][1]),
+        'saas': len(store_jobs[1][1]),
+        'repos': len(store_jobs[2][1])
+    }), 202
+
+
+@app.route('/api/translations/status', methods=['GET'])
+def get_translation_status():
+    """Report the translation backend, its job queue and batching counters."""
+    with translation_stats_lock:
+        stats = dict(translation_stats)
+    with translation_batcher.lock:
+        stats['batching'] = dict(translation_batcher.stats)
+    return jsonify({
+        'enabled': translation_enabled(),
+        'backend': TRANSLATION_BACKEND,
+        'workers': TRANSLATION_WORKERS,
+        **stats
+    })
+
+
+# ============================================================================
+# CONDITIONAL REQUESTS
+# ============================================================================
+# Read endpoints expose a strong ETag derived from the version of the data
+# they are built from (file stat, repo fingerprint...). The version is checked
+# against If-None-Match / If-Modified-Since before anything is read or
+# serialized, so repeat polling mostly costs a stat() and a 304.
+
+def make_etag(*parts):
+    """Build an ETag value from the parts identifying a data version."""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def file_version(path):
+    """Return (version token, last modified datetime) for a file, from stat() only."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return '-', None
+    last_modified = datetime.fromtimestamp(int(st.st_mtime), timezone.utc)
+    return f'{st.st_ino}:{st.st_mtime_ns}:{st.st_size}', last_modified
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Return a 304 response if the client copy is still current, else None.
+    The gzip variant of an encoded_response() carries its own ETag
+    (`{etag}-gzip`): both forms validate, and the 304 echoes the one sent.
+    """
+    if request.if_none_match:
+        matched = next((tag for tag in (etag, f'{etag}-gzip') if request.if_none_match.contains_weak(tag)), None)
+        fresh = matched is not None
+        if fresh:
+            etag = matched
+    else:
+        fresh = bool(last_modified and request.if_modified_since and last_modified <= request.if_modified_since)
+
+    if not fresh:
+        return None
+
+    response = Response(status=304)
+    return with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified=None):
+    """Attach ETag/Last-Modified to a response and require revalidation."""
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# Hot read endpoints also keep their encoded response body (plus a gzip
+# variant) under the same version as their ETag: a cache hit writes the
+# stored bytes instead of serializing again.
+
+RESPONSE_GZIP_MIN_SIZE = 1024  # smaller bodies are not worth compressing
+encoded_responses = LRUCache(maxsize=64)
+encoded_responses_lock = threading.Lock()
+
+
+def encode_body(data):
+    """Return the {encoding: bytes} variants of a response body."""
+    variants = {'identity': data}
+    if len(data) >= RESPONSE_GZIP_MIN_SIZE:
+        gzipped = gzip.compress(data, compresslevel=6, mtime=0)
+        if len(gzipped) < len(data):
+            variants['gzip'] = gzipped
+    return variants
+
+
+def encoded_response(variants, mimetype, etag=None, last_modified=None):
+    """
+    Build a response from encode_body() variants, in the best encoding the
+    client accepts. The ETag is strong, so the gzip body gets its own
+    (`{etag}-gzip`, as static assets do).
+    """
+    encoding = 'identity'
+    if 'gzip' in variants and request.accept_encodings['gzip']:
+        encoding = 'gzip'
+
+    response = Response(variants[encoding], mimetype=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    if etag:
+        with_validators(response, etag if encoding == 'identity' else f'{etag}-{encoding}', last_modified)
+    return response
+
+
+def cached_json_response(key, etag, build, last_modified=None):
+    """
+    JSON response for `key` at the version `etag`, calling build() for the
+    data only when the stored body is missing or outdated.
+    """
+    with encoded_responses_lock:
+        cached = encoded_responses.get(key)
+    if cached is not None and cached[0] == etag:
+        variants = cached[1]
+    else:
+        variants = encode_body(app.json.encode(build()) + b'\n')
+        with encoded_responses_lock:
+            encoded_responses[key] = (etag, variants)
+    return encoded_response(variants, 'application/json', etag, last_modified)
+
+
 # ============================================================================
 # STATIC FILES
 # ============================================================================
+# Text assets (JS, CSS, HTML, i18n JSON, SVG) go through an in-memory pipeline
+# built at first use: each file gets a content hash and gzip/brotli variants.
+# Relative JS module imports and the references in index.html are rewritten to
+# hashed URLs (?v=<hash>), so a file's hash also covers its dependencies and
+# hashed URLs can be served with `Cache-Control: immutable`. Unhashed URLs are
+# revalidated through their ETag. Other files fall back to send_from_directory.
+
+STATIC_PIPELINE_EXTENSIONS = {'.js', '.css', '.html', '.json', '.svg'}
+STATIC_IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+STATIC_RECHECK_INTERVAL = 2  # seconds between on-disk change checks
+
+JS_IMPORT_PATTERN = re.compile(r'''((?:\bfrom|\bimport)\s*\(?\s*)(['"])(\.{1,2}/[^'"?]+\.js)\2''')
+HTML_ASSET_PATTERN = re.compile(r'''\b(href|src)="([^"?#:]+)(?:\?v=[^"]*)?"''')
+
+static_assets = {'signature': None, 'checked_at': 0, 'assets': {}}
+static_assets_lock = threading.Lock()
+
+
+def scan_static_files():
+    """Return {relative path: mtime_ns} for the files handled by the pipeline."""
+    files = {}
+    static_root = Path(app.static_folder)
+    for root, _, names in os.walk(static_root):
+        for name in names:
+            if os.path.splitext(name)[1].lower() in STATIC_PIPELINE_EXTENSIONS:
+                full_path = Path(root) / name
+                try:
+                    files[full_path.relative_to(static_root).as_posix()] = full_path.stat().st_mtime_ns
+                except OSError:
+                    continue
+    return files
+
+
+def build_static_assets(files):
+    """
+    Build the asset table: final (rewritten) content, hash and compressed
+    variants of every pipeline file. Returns {relative path: asset}.
+    """
+    static_root = Path(app.static_folder)
+    sources = {}
+    for rel_path in files:
+        try:
+            sources[rel_path] = (static_root / rel_path).read_bytes()
+        except OSError:
+            continue
+
+    contents = {}
+    hashes = {}
+
+    def content_hash(data):
+        return hashlib.sha256(data).hexdigest()[:12]
+
+    def resolve(rel_path, visiting=()):
+        """Rewrite a JS file's imports (depth first) and hash the result."""
+        if rel_path in hashes:
+            return hashes[rel_path]
+        if rel_path in visiting:
+            # Import cycle: reference the unrewritten content
+            return content_hash(sources[rel_path])
+
+        base_dir = posixpath.dirname(rel_path)
+
+        def rewrite(match):
+            target = posixpath.normpath(posixpath.join(base_dir, match.group(3)))
+            if target not in sources:
+                return match.group(0)
+            version = resolve(target, visiting + (rel_path,))
+            return f'{match.group(1)}{match.group(2)}{match.group(3)}?v={version}{match.group(2)}'
+
+        text = sources[rel_path].decode('utf-8')
+        contents[rel_path] = JS_IMPORT_PATTERN.sub(rewrite, text).encode('utf-8')
+        hashes[rel_path] = content_hash(contents[rel_path])
+        return hashes[rel_path]
+
+    for rel_path in sources:
+        if rel_path.endswith('.js'):
+            resolve(rel_path)
+        elif not rel_path.endswith('.html'):
+            contents[rel_path] = sources[rel_path]
+            hashes[rel_path] = content_hash(sources[rel_path])
+
+    # HTML last: it references the hashes of everything else
+    versions = {path: version for path, version in hashes.items() if path.startswith('i18n/')}
+    versions_script = f'<script>window.ASSET_VERSIONS = {json.dumps(versions, sort_keys=True)};</script>\n    '
+    for rel_path in sources:
+        if not rel_path.endswith('.html'):
+            continue
+        base_dir = posixpath.dirname(rel_path)
+
+        def rewrite(match):
+            target = posixpath.normpath(posixpath.join(base_dir, match.group(2)))
+            if target not in hashes:
+                return match.group(0)
+            return f'{match.group(1)}="{match.group(2)}?v={hashes[target]}"'
+
+        text = HTML_ASSET_PATTERN.sub(rewrite, sources[rel_path].decode('utf-8'))
+        text = text.replace('<script', versions_script + '<script', 1)
+        contents[rel_path] = text.encode('utf-8')
+        hashes[rel_path] = content_hash(contents[rel_path])
+
+    assets = {}
+    for rel_path, data in contents.items():
+        content_type = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json', 'image/svg+xml'):
+            content_type += '; charset=utf-8'
+
+        variants = {'identity': data}
+        gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(gzipped) < len(data):
+            variants['gzip'] = gzipped
+        if BROTLI_AVAILABLE:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                variants['br'] = compressed
+
+        assets[rel_path] = {'hash': hashes[rel_path], 'content_type': content_type, 'variants': variants}
+    return assets
+
+
+def get_static_asset(rel_path):
+    """Return the pipeline asset for a path, rebuilding the table when files changed."""
+    now = time.monotonic()
+    with static_assets_lock:
+        if now - static_assets['checked_at'] >= STATIC_RECHECK_INTERVAL:
+            files = scan_static_files()
+            signature = hashlib.sha1(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()
+            if signature != static_assets['signature']:
+                static_assets['assets'] = build_static_assets(files)
+                static_assets['signature'] = signature
+            static_assets['checked_at'] = now
+        return static_assets['assets'].get(rel_path)
+
+
+def static_asset_response(asset):
+    """Serve a pipeline asset with the best encoding the client accepts."""
+    variants = asset['variants']
+    encoding = request.accept_encodings.best_match([e for e in ('br', 'gzip') if e in variants]) or 'identity'
+    etag = f"{asset['hash']}-{encoding}"
+
+    response = not_modified(etag)
+    if response is None:
+        response = with_validators(Response(variants[encoding], content_type=asset['content_type']), etag)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+
+    response.vary.add('Accept-Encoding')
+    if request.args.get('v') == asset['hash']:
+        response.headers['Cache-Control'] = STATIC_IMMUTABLE_CACHE
+    return response
+
 
 @app.route('/')
 def serve_index():
-    return send_from_directory(app.static_folder, 'index.html')
-
-@app.route('/<path:path>')
-def serve_static(path):
-    return send_from_directory(app.static_folder, path)
+    asset = get_static_asset('index.html')
+    if asset is None:
+        return send_from_directory(app.static_folder, 'index.html')
+    return static_asset_response(asset)
+
+# Flask registers its own static rule on '/<path:filename>' (static_url_path='');
+# route it through the asset pipeline
+@app.endpoint('static')
+def serve_static(filename):
+    asset = get_static_asset(posixpath.normpath(filename))
+    if asset is None:
+        return send_from_directory(app.static_folder, filename)
+    return static_asset_response(asset)
 
 @app.route('/data/icons/<path:path>')
 def serve_data_icons(path):
     """Serve uploaded icons from data/icons/ directory."""
     return send_from_directory(DATA_DIR / 'icons', path)
 
+# ============================================================================
+# DOCUMENT STORE
+# ============================================================================
+# cards.json, saas.json, repos.json and admin.json are kept parsed in memory
+# and only re-read when the file stat (inode, mtime, size) changes. Entries of
+# the collection are indexed by id for O(1) lookups. Writes go through a
+# per-document lock and an atomic temp file + fsync + rename, so concurrent
+# readers never see a truncated file and writers can't lose each other's
+# updates.
+#
+# With STORAGE_BACKEND=sqlite the same documents live in a SQLite database
+# (WAL mode) instead: one row per collection entry, so a write only touches
+# the rows that changed and is safe across worker processes. Both stores
+# expose the same read/get/write/transaction/version interface.
+
+def atomic_write_json(path, data, indent=2):
+    """Write JSON to `path` atomically (temp file in the same dir + fsync + rename)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
+
+
+class JsonDocumentStore:
+    """A JSON file cached in memory, with an id index over one collection."""
+
+    def __init__(self, path, collection=None, default=None):
+        self.path = path
+        self.collection = collection
+        self.default = default
+        self.lock = threading.RLock()  # held by writers for read-modify-write
+        self._cache_lock = threading.Lock()
+        self._cache = (None, None, {})  # (file version, document, id index)
+
+    def _load(self):
+        """Return the cached (document, index), re-reading the file if it changed."""
+        version = file_version(self.path)[0]
+        with self._cache_lock:
+            cached_version, document, index = self._cache
+        if document is not None and version == cached_version:
+            return document, index
+
+        if version == '-':
+            # Missing file: serve the default document (None lets callers migrate)
+            document = copy.deepcopy(self.default)
+        else:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+        index = self._build_index(document)
+
+        with self._cache_lock:
+            self._cache = (version, document, index)
+        return document, index
+
+    def _build_index(self, document):
+        if not self.collection or not document:
+            return {}
+        return {item['id']: item for item in document.get(self.collection, []) if 'id' in item}
+
+    def read(self):
+        """Return the current document. It is shared: callers must not mutate it."""
+        return self._load()[0]
+
+    def get(self, item_id):
+        """Return the collection entry with this id (shared, read-only), or None."""
+        return self._load()[1].get(item_id)
+
+    def write(self, document):
+        """Persist a document atomically and make it the cached version."""
+        with self.lock:
+            atomic_write_json(self.path, document)
+            with self._cache_lock:
+                self._cache = (file_version(self.path)[0], document, self._build_index(document))
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yield a private copy of the document under the writer lock and save it
+        on exit if it was modified (an exception discards the changes).
+        """
+        with self.lock:
+            current = self.read()
+            document = copy.deepcopy(current)
+            yield document
+            if document != current:
+                self.write(document)
+
+    def version(self):
+        """Return (version token, last modified datetime) of the document."""
+        return file_version(self.path)
+
+
+sqlite_connections = threading.local()  # one connection per thread and database
+
+
+def get_sqlite_connection(db_path, schema):
+    """
+    Return this thread's connection to a SQLite database (WAL mode, autocommit:
+    transactions are opened explicitly with BEGIN), creating the schema once.
+    """
+    connections = getattr(sqlite_connections, 'connections', None)
+    if connections is None:
+        connections = sqlite_connections.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(db_path), timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(schema)
+        connections[db_path] = conn
+    return conn
+
+
+def trim_lru_table(conn, table, max_entries):
+    """Delete the least recently used rows (by `last_used`) of a cache table over `max_entries`."""
+    (count,) = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()
+    if count > max_entries:
+        conn.execute(
+            f'DELETE FROM {table} WHERE key IN (SELECT key FROM {table} ORDER BY last_used LIMIT ?)',
+            (count - max_entries,)
+        )
+
+
+class SqliteDocumentStore:
+    """
+    A document stored in SQLite: the entries of its collection are rows keyed
+    by (document name, id), the rest of the document is a single row carrying
+    a generation counter. Reads are cached in memory and revalidated against
+    the generation; writes diff the document and only touch changed rows.
+    The JSON file is imported once, the first time the document is opened.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            name TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            generation INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS items (
+            name TEXT NOT NULL,
+            id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (name, id)
+        ) WITHOUT ROWID;
+    """
+    def __init__(self, db_path, json_path, collection=None, default=None):
+        self.db_path = db_path
+        self.path = json_path
+        self.name = json_path.stem
+        self.collection = collection
+        self.default = default
+        self.lock = threading.RLock()  # held by writers for read-modify-write
+        self._cache_lock = threading.Lock()
+        self._cache = (None, None, {}, None)  # (generation, document, id index, updated_at)
+        self._migrated = False
+
+    def _connect(self):
+        conn = get_sqlite_connection(self.db_path, self.SCHEMA)
+        if not self._migrated:
+            self._migrate(conn)
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn, immediate=False):
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        try:
+            yield
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _migrate(self, conn):
+        """Import the JSON file if this document is not in the database yet."""
+        with self.lock:
+            if self._migrated:
+                return
+            with self._transaction(conn, immediate=True):
+                exists = conn.execute('SELECT 1 FROM documents WHERE name = ?', (self.name,)).fetchone()
+                if not exists and self.path.exists():
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        self._apply(conn, None, json.load(f))
+            self._migrated = True
+
+    def _item_key(self, position, item):
+        return str(item['id']) if 'id' in item else f'~{position}'
+
+    def _fetch(self, conn):
+        """Read (generation, document, updated_at) from the database."""
+        row = conn.execute(
+            'SELECT data, generation, updated_at FROM documents WHERE name = ?', (self.name,)
+        ).fetchone()
+        if row is None:
+            return 0, copy.deepcopy(self.default), None
+
+        document = json.loads(row[0])
+        if self.collection:
+            rows = conn.execute(
+                'SELECT data FROM items WHERE name = ? ORDER BY position', (self.name,)
+            ).fetchall()
+            document[self.collection] = [json.loads(data) for (data,) in rows]
+        return row[1], document, row[2]
+
+    def _apply(self, conn, old, new):
+        """Write the difference between two versions of the document (inside a transaction)."""
+        def dumps(value):
+            return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+        rest = {k: v for k, v in new.items() if k != self.collection} if self.collection else new
+        updated_at = time.time()
+        conn.execute(
+            'INSERT INTO documents (name, data, generation, updated_at) VALUES (?, ?, 1, ?) '
+            'ON CONFLICT (name) DO UPDATE SET data = excluded.data, '
+            'generation = generation + 1, updated_at = excluded.updated_at',
+            (self.name, dumps(rest), updated_at)
+        )
+        if not self.collection:
+            return updated_at
+
+        old_items = {}
+        for position, item in enumerate((old or {}).get(self.collection, [])):
+            old_items[self._item_key(position, item)] = (position, item)
+
+        upserts, moves, seen = [], [], set()
+        for position, item in enumerate(new.get(self.collection, [])):
+            key = self._item_key(position, item)
+            seen.add(key)
+            previous = old_items.get(key)
+            if previous is None or previous[1] != item:
+                upserts.append((self.name, key, position, dumps(item)))
+            elif previous[0] != position:
+                moves.append((position, self.name, key))
+
+        conn.executemany(
+            'INSERT INTO items (name, id, position, data) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (name, id) DO UPDATE SET position = excluded.position, data = excluded.data',
+            upserts
+        )
+        conn.executemany('UPDATE items SET position = ? WHERE name = ? AND id = ?', moves)
+        conn.executemany(
+            'DELETE FROM items WHERE name = ? AND id = ?',
+            [(self.name, key) for key in old_items if key not in seen]
+        )
+        return updated_at
+
+    def _build_index(self, document):
+        if not self.collection or not document:
+            return {}
+        return {item['id']: item for item in document.get(self.collection, []) if 'id' in item}
+
+    def _load(self):
+        """Return the cached (generation, document, index, updated_at), refreshed if stale."""
+        conn = self._connect()
+        row = conn.execute('SELECT generation FROM documents WHERE name = ?', (self.name,)).fetchone()
+        generation = row[0] if row else 0
+        with self._cache_lock:
+            cache = self._cache
+        if cache[0] == generation:
+            return cache
+
+        with self._transaction(conn):
+            generation, document, updated_at = self._fetch(conn)
+        cache = (generation, document, self._build_index(document), updated_at)
+        with self._cache_lock:
+            self._cache = cache
+        return cache
+
+    def _store(self, conn, old_generation, old, document):
+        updated_at = self._apply(conn, old, document)
+        with self._cache_lock:
+            self._cache = (old_generation + 1, document, self._build_index(document), updated_at)
+
+    def read(self):
+        """Return the current document. It is shared: callers must not mutate it."""
+        return self._load()[1]
+
+    def get(self, item_id):
+        """Return the collection entry with this id (shared, read-only), or None."""
+        return self._load()[2].get(item_id)
+
+    def write(self, document):
+        """Replace the stored document, writing only the rows that changed."""
+        with self.lock:
+            conn = self._connect()
+            with self._transaction(conn, immediate=True):
+                generation, current, _ = self._fetch(conn)
+                self._store(conn, generation, current, document)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yield a private copy of the document inside a write transaction and
+        save the changed rows on exit (an exception rolls everything back).
+        """
+        with self.lock:
+            conn = self._connect()
+            with self._transaction(conn, immediate=True):
+                generation, current, _ = self._fetch(conn)
+                document = copy.deepcopy(current)
+                yield document
+                if document != current:
+                    self._store(conn, generation, current, document)
+
+    def version(self):
+        """Return (version token, last modified datetime) of the document."""
+        generation, _, _, updated_at = self._load()
+        if updated_at is None:
+            return '-', None
+        return f'{generation}:{updated_at!r}', datetime.fromtimestamp(int(updated_at), timezone.utc)
+
+
+def open_document_store(path, collection=None, default=None):
+    """Return the store for a data file on the configured STORAGE_BACKEND."""
+    if STORAGE_BACKEND == 'sqlite':
+        return SqliteDocumentStore(STORAGE_DB_FILE, path, collection, default)
+    if STORAGE_BACKEND != 'json':
+        raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}' (expected 'json' or 'sqlite')")
+    return JsonDocumentStore(path, collection, default)
+
+
 # ============================================================================
 # AUTHENTICATION
 # ============================================================================
 
+admin_store = open_document_store(ADMIN_FILE)
+
 def load_admin():
     """Load admin credentials from JSON file, creating default if needed."""
-    if ADMIN_FILE.exists():
-        with open(ADMIN_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    admin_data = admin_store.read()
+    if admin_data is not None:
+        return admin_data
 
     # Create default admin credentials from environment variables
     if not ADMIN_PASSWORD:
         raise ValueError("ADMIN_PASSWORD environment variable is required for first-time setup")
 
-    default_admin = {
-        'username': ADMIN_USERNAME,
-        'passwordHash': generate_password_hash(ADMIN_PASSWORD)
-    }
-    save_admin(default_admin)
-    return default_admin
+    with admin_store.lock:
+        admin_data = admin_store.read()
+        if admin_data is None:
+            admin_data = {
+                'username': ADMIN_USERNAME,
+                'passwordHash': generate_password_hash(ADMIN_PASSWORD)
+            }
+            save_admin(admin_data)
+    return admin_data
 
 def save_admin(data):
     """Save admin credentials to JSON file."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(ADMIN_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    admin_store.write(data)
 
 def get_client_ip():
     """Get client IP address, considering proxies."""
@@ -285,33 +1429,39 @@ def login():
 # GIT REPOS PERSISTENCE
 # ============================================================================
 
+repos_store = open_document_store(REPOS_FILE, 'repos')
+
+def migrate_repos():
+    """Create repos.json from the hardcoded GIT_REPO_PATHS on first run."""
+    with repos_store.lock:
+        if repos_store.read() is not None:
+            return
+
+        repos = []
+        for repo_path in GIT_REPO_PATHS:
+            full_path = Path(GIT_REPOS_BASE) / repo_path
+            if (full_path / '.git').exists():
+                repos.append({
+                    'id': repo_path.replace('/', '_'),
+                    'path': repo_path,
+                    'name': full_path.name,
+                    'addedAt': datetime.utcnow().isoformat() + 'Z'
+                })
+
+        repos_store.write({'repos': repos})
+
 def load_repos():
-    """Load managed repos from JSON file, migrating from hardcoded list if needed."""
-    if REPOS_FILE.exists():
-        with open(REPOS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    # Migrate from hardcoded GIT_REPO_PATHS
-    repos = []
-    for repo_path in GIT_REPO_PATHS:
-        full_path = Path(GIT_REPOS_BASE) / repo_path
-        if (full_path / '.git').exists():
-            repos.append({
-                'id': repo_path.replace('/', '_'),
-                'path': repo_path,
-                'name': full_path.name,
-                'addedAt': datetime.utcnow().isoformat() + 'Z'
-            })
-
-    data = {'repos': repos}
-    save_repos(data)
+    """Load managed repos (shared document, read-only), migrating if needed."""
+    data = repos_store.read()
+    if data is None:
+        migrate_repos()
+        data = repos_store.read()
     return data
 
-def save_repos(data):
-    """Save repos to JSON file."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(REPOS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+def get_repo(repo_id):
+    """Look up a managed repo by id (shared entry, read-only)."""
+    load_repos()
+    return repos_store.get(repo_id)
 
 # ============================================================================
 # GIT HEATMAP API
@@ -321,27 +1471,38 @@ def save_repos(data):
 def list_repos():
     """List all managed git repositories."""
     data = load_repos()
-    default_repo = data.get('defaultRepo')
-    repos = []
-    for repo in data.get('repos', []):
-        full_path = Path(GIT_REPOS_BASE) / repo['path']
-        git_dir = full_path / '.git'
-        if git_dir.exists():
-            repos.append({
-                'id': repo['id'],
-                'name': repo['name'],
-                'displayName': repo.get('displayName'),
-                'description': repo.get('description'),
-                'url': repo.get('url'),
-                'path': repo['path'],
-                'fullPath': str(full_path),
-                'isDefault': repo['id'] == default_repo
-            })
-
-    # Sort: default repo first, then alphabetically by displayName or name
-    repos.sort(key=lambda r: (not r['isDefault'], (r.get('displayName') or r['name']).lower()))
-
-    return jsonify({'repos': repos, 'defaultRepo': default_repo})
+
+    # The listing depends on repos.json and on which repos still exist on disk
+    present = [(Path(GIT_REPOS_BASE) / repo['path'] / '.git').exists() for repo in data.get('repos', [])]
+    version, last_modified = repos_store.version()
+    etag = make_etag('repos', version, ''.join('1' if p else '0' for p in present))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    def build():
+        default_repo = data.get('defaultRepo')
+        repos = []
+        for repo, exists in zip(data.get('repos', []), present):
+            full_path = Path(GIT_REPOS_BASE) / repo['path']
+            if exists:
+                repos.append({
+                    'id': repo['id'],
+                    'name': repo['name'],
+                    'displayName': repo.get('displayName'),
+                    'description': repo.get('description'),
+                    'url': repo.get('url'),
+                    'translationStatus': repo.get('translationStatus'),
+                    'path': repo['path'],
+                    'fullPath': str(full_path),
+                    'isDefault': repo['id'] == default_repo
+                })
+
+        # Sort: default repo first, then alphabetically by displayName or name
+        repos.sort(key=lambda r: (not r['isDefault'], (r.get('displayName') or r['name']).lower()))
+        return {'repos': repos, 'defaultRepo': default_repo}
+
+    return cached_json_response('repos', etag, build)
 
 @app.route('/api/git/repos/discover', methods=['GET'])
 def discover_repos():
@@ -394,7 +1555,7 @@ def discover_repos():
 @app.route('/api/git/repos', methods=['POST'])
 def add_repo():
     """Add a repository to the managed list."""
-    data = load_repos()
+    load_repos()
     new_repo = request.get_json()
 
     # Validate required fields
@@ -406,72 +1567,82 @@ def add_repo():
     if not (full_path / '.git').exists():
         return jsonify({'error': 'Depot Git non trouve a ce chemin'}), 404
 
-    # Check for duplicates
-    existing_ids = {repo['id'] for repo in data.get('repos', [])}
     repo_id = new_repo['path'].replace('/', '_')
 
-    if repo_id in existing_ids:
-        return jsonify({'error': 'Ce depot est deja dans la liste'}), 409
-
-    # Add new repo
-    repo_entry = {
-        'id': repo_id,
-        'path': new_repo['path'],
-        'name': new_repo.get('name', full_path.name),
-        'addedAt': datetime.utcnow().isoformat() + 'Z'
-    }
+    with repos_store.transaction() as data:
+        # Check for duplicates
+        existing_ids = {repo['id'] for repo in data.get('repos', [])}
+        if repo_id in existing_ids:
+            return jsonify({'error': 'Ce depot est deja dans la liste'}), 409
+
+        # Add new repo
+        repo_entry = {
+            'id': repo_id,
+            'path': new_repo['path'],
+            'name': new_repo.get('name', full_path.name),
+            'addedAt': datetime.utcnow().isoformat() + 'Z'
+        }
 
-    data['repos'].append(repo_entry)
-    save_repos(data)
+        data['repos'].append(repo_entry)
 
+    wake_heatmap_warmer()
     return jsonify(repo_entry), 201
 
 @app.route('/api/git/repos/<repo_id>', methods=['DELETE'])
 def delete_repo(repo_id):
     """Remove a repository from the managed list."""
-    data = load_repos()
+    load_repos()
 
-    # Prevent deletion of the last repository
-    if len(data['repos']) <= 1:
-        return jsonify({'error': 'Impossible de supprimer le dernier depot'}), 400
+    with repos_store.transaction() as data:
+        # Prevent deletion of the last repository
+        if len(data['repos']) <= 1:
+            return jsonify({'error': 'Impossible de supprimer le dernier depot'}), 400
 
-    original_len = len(data['repos'])
-    data['repos'] = [r for r in data['repos'] if r['id'] != repo_id]
+        original_len = len(data['repos'])
+        data['repos'] = [r for r in data['repos'] if r['id'] != repo_id]
 
-    if len(data['repos']) == original_len:
-        return jsonify({'error': 'Depot non trouve'}), 404
+        if len(data['repos']) == original_len:
+            return jsonify({'error': 'Depot non trouve'}), 404
 
-    # If deleted repo was the default, assign the first remaining one
-    if data.get('defaultRepo') == repo_id:
-        data['defaultRepo'] = data['repos'][0]['id'] if data['repos'] else None
+        # If deleted repo was the default, assign the first remaining one
+        if data.get('defaultRepo') == repo_id:
+            data['defaultRepo'] = data['repos'][0]['id'] if data['repos'] else None
 
-    save_repos(data)
+    delete_commit_index(repo_id)
+    wake_heatmap_warmer()
     return jsonify({'success': True, 'newDefaultRepo': data.get('defaultRepo')})
 
 @app.route('/api/git/repos/<repo_id>/default', methods=['POST'])
 def set_default_repo(repo_id):
     """Set a repository as the default."""
-    data = load_repos()
-
     # Check if repo exists
-    repo_exists = any(r['id'] == repo_id for r in data['repos'])
-    if not repo_exists:
+    if not get_repo(repo_id):
         return jsonify({'error': 'Depot non trouve'}), 404
 
-    data['defaultRepo'] = repo_id
-    save_repos(data)
+    with repos_store.transaction() as data:
+        data['defaultRepo'] = repo_id
     return jsonify({'success': True, 'defaultRepo': repo_id})
 
 @app.route('/api/git/repos/<repo_id>', methods=['PATCH'])
 def update_repo(repo_id):
     """Update repository metadata (displayName, description, url)."""
-    data = load_repos()
+    load_repos()
+    updates = request.get_json()
 
-    repo = next((r for r in data['repos'] if r['id'] == repo_id), None)
-    if not repo:
-        return jsonify({'error': 'Depot non trouve'}), 404
+    with repos_store.transaction() as data:
+        repo = next((r for r in data['repos'] if r['id'] == repo_id), None)
+        if not repo:
+            return jsonify({'error': 'Depot non trouve'}), 404
 
-    updates = request.get_json()
+        apply_repo_updates(repo, updates)
+        flag_pending_translation(repo)
+
+    queue_translation(repos_store, repo)
+    return jsonify(repo)
+
+
+def apply_repo_updates(repo, updates):
+    """Apply the editable metadata fields of a PATCH request to a repo entry."""
 
     # Update allowed fields
     if 'displayName' in updates:
@@ -507,171 +1678,1496 @@ def update_repo(repo_id):
         elif 'url' in repo:
             del repo['url']
 
-    save_repos(data)
-    return jsonify(repo)
-
-
-@app.route('/api/git/heatmap/global', methods=['GET'])
-def get_global_heatmap():
-    """
-    Get aggregated commit heatmap data for all managed repositories.
-    Returns commits grouped by date and hour (0-23).
 
-    Query params:
-    - since: Start date in YYYY-MM-DD format (optional, defaults to earliest first commit)
-    """
-    data = load_repos()
-    repos = data.get('repos', [])
+# ============================================================================
+# GIT COMMIT INDEX
+# ============================================================================
+# Each repo keeps a persistent index of its commits bucketed by hour, together
+# with the ref tips that were scanned. A refresh only walks commits reachable
+# from new tips (old_tips..new_tips); deleted refs and force-pushes trigger a
+# full rebuild since commits may have become unreachable.
 
-    if not repos:
-        return jsonify({'error': 'No repositories configured'}), 404
+HEATMAP_INDEX_VERSION = 1
+commit_index_locks = {}
+commit_index_locks_lock = threading.Lock()
 
-    since_date = request.args.get('since', None)
 
-    # Check cache first (thread-safe)
-    cache_key = f"global:{since_date or 'all'}"
-    with heatmap_cache_lock:
-        if cache_key in heatmap_cache:
-            return jsonify(heatmap_cache[cache_key])
+def resolve_git_dirs(full_path):
+    """
+    Return the git directories holding the refs of a working tree: the .git
+    directory itself, plus the common dir for linked worktrees.
+    """
+    git_dir = full_path / '.git'
+    if git_dir.is_file():
+        # Worktrees and submodules use a "gitdir: <path>" file
+        content = git_dir.read_text(encoding='utf-8').strip()
+        if content.startswith('gitdir:'):
+            git_dir = (full_path / content[len('gitdir:'):].strip()).resolve()
+
+    git_dirs = [git_dir]
+    commondir_file = git_dir / 'commondir'
+    if commondir_file.is_file():
+        common_dir = (git_dir / commondir_file.read_text(encoding='utf-8').strip()).resolve()
+        git_dirs.append(common_dir)
+    return git_dirs
+
+
+def get_repo_fingerprint(full_path):
+    """
+    Cheap fingerprint of the refs of a repository, built from stat() calls only:
+    HEAD, packed-refs and every file under refs/. Any commit, push, fetch, ref
+    creation or deletion changes it; reading it never spawns git.
+    """
+    parts = []
+    for git_dir in resolve_git_dirs(full_path):
+        for name in ('HEAD', 'packed-refs'):
+            try:
+                st = os.stat(git_dir / name)
+                parts.append(f'{git_dir}/{name}:{st.st_ino}:{st.st_mtime_ns}:{st.st_size}')
+            except OSError:
+                parts.append(f'{git_dir}/{name}:-')
+
+        for root, _, files in os.walk(git_dir / 'refs'):
+            for name in files:
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                parts.append(f'{root}/{name}:{st.st_ino}:{st.st_mtime_ns}:{st.st_size}')
 
-    try:
-        # Aggregate commits from all repos
-        all_commits = {}
-        earliest_date = None
-        repo_count = 0
+    parts.sort()
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
 
-        for repo in repos:
-            repo_path = repo['path']
-            full_path = Path(GIT_REPOS_BASE) / repo_path
 
-            if not (full_path / '.git').exists():
-                continue
+def get_commit_index_lock(repo_id):
+    """Return the lock serializing index updates for a repository."""
+    with commit_index_locks_lock:
+        if repo_id not in commit_index_locks:
+            commit_index_locks[repo_id] = threading.Lock()
+        return commit_index_locks[repo_id]
 
-            repo_count += 1
 
-            # Build git log command
-            git_cmd = [
-                'git', '-C', str(full_path),
-                'log', '--all',
-                '--format=%ad',
-                '--date=format-local:%Y-%m-%d %H'
-            ]
+def get_ref_tips(full_path, timeout=10):
+    """
+    Return {refname: sha} for every ref walked by `git log --all` (HEAD included).
+    An empty repository has no refs and returns an empty dict.
+    """
+    result = subprocess.run(
+        ['git', '-C', str(full_path), 'show-ref', '--head'],
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    # show-ref exits with 1 when the repository has no refs at all
+    if result.returncode not in (0, 1):
+        raise RuntimeError('Git command failed')
+
+    tips = {}
+    for line in result.stdout.splitlines():
+        sha, _, ref = line.partition(' ')
+        if sha and ref:
+            tips[ref] = sha
+    return tips
+
+
+def is_ancestor(full_path, old_sha, new_sha, timeout=10):
+    """Check whether old_sha is reachable from new_sha (fast-forward update)."""
+    result = subprocess.run(
+        ['git', '-C', str(full_path), 'merge-base', '--is-ancestor', old_sha, new_sha],
+        capture_output=True,
+        timeout=timeout
+    )
+    return result.returncode == 0
+
+
+def scan_commit_hours(full_path, include, exclude=(), timeout=30):
+    """
+    Count commits reachable from `include` but not from `exclude`, bucketed by
+    local author date and hour. Returns {"YYYY-MM-DD-HH": count}.
 
-            if since_date:
-                git_cmd.append(f'--since={since_date}')
+    git's output is consumed line by line as it is produced and aggregated on
+    the fly, so memory stays bounded by the number of distinct hours rather
+    than the length of the history.
+    """
+    if not include:
+        return {}
 
-            result = subprocess.run(
-                git_cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+    # Revisions go through stdin so repos with many refs never hit argv limits
+    revs = [sha for sha in include] + [f'^{sha}' for sha in exclude]
+    process = subprocess.Popen(
+        [
+            'git', '-C', str(full_path),
+            'log', '--stdin',
+            '--format=%ad',
+            '--date=format-local:%Y-%m-%d-%H'
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    # The whole walk shares one deadline: past it git is killed
+    timed_out = threading.Event()
+
+    def expire():
+        timed_out.set()
+        process.kill()
+
+    watchdog = threading.Timer(timeout, expire)
+    watchdog.start()
+
+    buckets = {}
+    try:
+        # git reads every revision from stdin before it starts walking
+        process.stdin.write(('\n'.join(revs) + '\n').encode('ascii'))
+        process.stdin.close()
+
+        for line in process.stdout:
+            line = line.rstrip()
+            if line:
+                buckets[line] = buckets.get(line, 0) + 1
+        returncode = process.wait()
+    except BrokenPipeError:
+        returncode = process.wait()
+    finally:
+        watchdog.cancel()
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(process.args, timeout)
+    if returncode != 0:
+        raise RuntimeError('Git command failed')
+
+    return {key.decode('ascii'): count for key, count in buckets.items()}
+
+
+def needs_full_rebuild(full_path, old_tips, new_tips, timeout=10):
+    """
+    Detect ref deletions and non fast-forward updates (force-push, rewritten
+    tags), both of which can make already counted commits unreachable.
+    """
+    for ref, old_sha in old_tips.items():
+        new_sha = new_tips.get(ref)
+        if new_sha is None:
+            return True
+        if new_sha != old_sha and not is_ancestor(full_path, old_sha, new_sha, timeout):
+            return True
+    return False
 
-            if result.returncode != 0:
-                continue
 
-            # Parse commits
-            lines = result.stdout.strip().split('\n')
-            for line in lines:
-                if not line:
-                    continue
-                parts = line.split(' ')
-                if len(parts) >= 2:
-                    date = parts[0]
-                    hour = parts[1]
-                    key = f"{date}-{hour}"
-                    all_commits[key] = all_commits.get(key, 0) + 1
-
-            # Get first commit date for this repo
-            if not since_date:
-                first_cmd = [
-                    'git', '-C', str(full_path),
-                    'log', '--all', '--reverse',
-                    '--format=%ad',
-                    '--date=format-local:%Y-%m-%d',
-                ]
-                first_result = subprocess.run(first_cmd, capture_output=True, text=True, timeout=10)
-                first_lines = first_result.stdout.strip().split('\n')
-                if first_lines and first_lines[0]:
-                    repo_first_date = first_lines[0]
-                    if earliest_date is None or repo_first_date < earliest_date:
-                        earliest_date = repo_first_date
-
-        if repo_count == 0:
-            return jsonify({'error': 'No valid repositories found'}), 404
+def load_commit_index(repo_id):
+    """Load a repository commit index from disk, or None if missing/outdated."""
+    index_file = HEATMAP_INDEX_DIR / f'{repo_id}.json'
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if index.get('version') != HEATMAP_INDEX_VERSION:
+        return None
+    return index
 
-        if not since_date:
-            since_date = earliest_date or datetime.now().strftime('%Y-%m-%d')
 
-        # Calculate statistics
-        total_commits = sum(all_commits.values())
-        unique_dates = set(k.rsplit('-', 1)[0] for k in all_commits.keys()) if all_commits else set()
-        unique_days = len(unique_dates)
+def save_commit_index(repo_id, index):
+    """Persist a repository commit index atomically (temp file + rename)."""
+    atomic_write_json(HEATMAP_INDEX_DIR / f'{repo_id}.json', index, indent=None)
 
-        # Find peak hour
-        hour_counts = {}
-        for key, count in all_commits.items():
-            hour = key.split('-')[-1]
-            hour_counts[hour] = hour_counts.get(hour, 0) + count
-        peak_hour = max(hour_counts, key=hour_counts.get) if hour_counts else '12'
 
-        # Calculate current streak (consecutive days up to today)
-        current_streak = 0
-        if unique_dates:
-            today = datetime.now().date()
-            check_date = today
-            sorted_dates = sorted(unique_dates, reverse=True)
-            date_set = set(sorted_dates)
-
-            # Check if today or yesterday has commits (streak can include today)
-            while check_date.isoformat() in date_set:
-                current_streak += 1
-                check_date = check_date - timedelta(days=1)
-
-            # If no commits today, check from yesterday
-            if current_streak == 0:
-                check_date = today - timedelta(days=1)
-                while check_date.isoformat() in date_set:
-                    current_streak += 1
-                    check_date = check_date - timedelta(days=1)
-
-        # Find busiest day of week
-        day_names_fr = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-        weekday_counts = {i: 0 for i in range(7)}
-        for key, count in all_commits.items():
-            date_str = key.rsplit('-', 1)[0]
+def delete_commit_index(repo_id):
+    """Remove the persisted commit index of a repository, if any."""
+    commit_histograms.pop(repo_id, None)
+    try:
+        (HEATMAP_INDEX_DIR / f'{repo_id}.json').unlink()
+    except OSError:
+        pass
+
+
+def update_commit_index(repo_id, full_path, timeout=30, fingerprint=None):
+    """
+    Bring the commit index of a repository up to date and return it.
+    When the ref fingerprint is unchanged the index is returned without
+    running git. Otherwise only commits added since the last scan are walked,
+    unless refs were deleted or rewritten, in which case the index is rebuilt
+    from scratch. With HEATMAP_COMMIT_GRAPH, the commit-graph reader rebuilds
+    it without git whenever it can.
+    Raises subprocess.TimeoutExpired if git does not answer within `timeout`.
+    """
+    lock = get_commit_index_lock(repo_id)
+    if not lock.acquire(timeout=timeout):
+        raise subprocess.TimeoutExpired('git', timeout)
+
+    try:
+        # Fingerprint before reading tips: a concurrent push only makes it stale
+        if fingerprint is None:
+            fingerprint = get_repo_fingerprint(full_path)
+
+        index = load_commit_index(repo_id)
+        if index is not None and index.get('fingerprint') == fingerprint:
+            return index
+
+        # Read refs natively when the commit-graph scan is enabled
+        native_refs = None
+        if HEATMAP_COMMIT_GRAPH:
             try:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                weekday_counts[date_obj.weekday()] += count
-            except ValueError:
+                native_refs = read_native_refs(full_path)
+            except (CommitGraphUnavailable, OSError, UnicodeDecodeError):
                 pass
-        busiest_weekday = max(weekday_counts, key=weekday_counts.get) if any(weekday_counts.values()) else 0
-        busiest_day = day_names_fr[busiest_weekday]
+
+        source = 'commit-graph' if native_refs else 'git'
+        tips = native_refs[0] if native_refs else get_ref_tips(full_path, timeout)
+
+        if index is not None and index['tips'] == tips and index.get('source', 'git') == source:
+            index['fingerprint'] = fingerprint
+            save_commit_index(repo_id, index)
+            return index
+
+        buckets = None
+        if native_refs:
+            try:
+                # A full walk of the graph is cheap: no incremental update needed
+                buckets = scan_commit_graph(full_path, *native_refs)
+            except CommitGraphUnavailable:
+                source = 'git'
+                tips = get_ref_tips(full_path, timeout)
+
+        if buckets is None:
+            new_shas = set(tips.values())
+
+            # Buckets built from commit dates can't be updated with author dates
+            if (index is None or index.get('source', 'git') != 'git'
+                    or needs_full_rebuild(full_path, index['tips'], tips, timeout)):
+                buckets = scan_commit_hours(full_path, new_shas, timeout=timeout)
+            else:
+                old_shas = set(index['tips'].values())
+                buckets = index['buckets']
+                added = scan_commit_hours(full_path, new_shas - old_shas, old_shas, timeout)
+                for key, count in added.items():
+                    buckets[key] = buckets.get(key, 0) + count
+
+        index = {
+            'version': HEATMAP_INDEX_VERSION,
+            'fingerprint': fingerprint,
+            'source': source,
+            'tips': tips,
+            'buckets': buckets,
+            'updatedAt': datetime.utcnow().isoformat() + 'Z'
+        }
+        save_commit_index(repo_id, index)
+        return index
+    finally:
+        lock.release()
+
+
+def get_repo_histogram(repo_id, full_path, since_date=None, timeout=30, fingerprint=None):
+    """
+    Return the CommitHistogram of a repository from its commit index, starting
+    at `since_date` (a date) when given. The dense histogram is rebuilt only
+    when the index content changes.
+    """
+    index = update_commit_index(repo_id, full_path, timeout, fingerprint)
+
+    cached = commit_histograms.get(repo_id)
+    if cached is not None and cached[0] == index['updatedAt']:
+        histogram = cached[1]
+    else:
+        histogram = CommitHistogram.from_buckets(index['buckets'])
+        commit_histograms[repo_id] = (index['updatedAt'], histogram)
+
+    return histogram.since(since_date)
+
+
+# ============================================================================
+# COMMIT-GRAPH READER
+# ============================================================================
+# Optional (HEATMAP_COMMIT_GRAPH=1) native scan that answers a heatmap without
+# spawning git: refs are read from HEAD, loose refs and packed-refs, and the
+# reachable commits are walked through the commit-graph file (or chain) via a
+# read-only mmap. Commits newer than the graph are read from loose objects.
+# The commit-graph only stores committer timestamps, so buckets use the commit
+# date instead of the author date `git log` reports (they differ for rebased
+# or cherry-picked commits). Anything the reader can't resolve (no graph,
+# reftable, alternates, packed commits missing from the graph...) raises
+# CommitGraphUnavailable and the caller falls back to git.
+
+COMMIT_GRAPH_SIGNATURE = b'CGPH'
+COMMIT_GRAPH_HASH_LENGTHS = {1: 20, 2: 32}  # SHA-1, SHA-256
+COMMIT_GRAPH_NO_PARENT = 0x70000000
+COMMIT_GRAPH_EXTRA_EDGES = 0x80000000
+
+
+class CommitGraphUnavailable(Exception):
+    """The native reader can't scan this repository: use git instead."""
+
+
+class CommitGraphLayer:
+    """One commit-graph file, memory-mapped read-only."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        data = self.data
+        if data[:4] != COMMIT_GRAPH_SIGNATURE or data[4] != 1:
+            raise CommitGraphUnavailable(f'Unsupported commit-graph: {path}')
+        self.hash_length = COMMIT_GRAPH_HASH_LENGTHS.get(data[5])
+        if self.hash_length is None:
+            raise CommitGraphUnavailable(f'Unsupported hash version: {path}')
+
+        chunks = {}
+        for i in range(data[6] + 1):
+            chunk_id, offset = struct.unpack_from('>4sQ', data, 8 + 12 * i)
+            chunks[chunk_id] = offset
+        if not all(chunk in chunks for chunk in (b'OIDF', b'OIDL', b'CDAT')):
+            raise CommitGraphUnavailable(f'Incomplete commit-graph: {path}')
+
+        self.fanout = struct.unpack_from('>256I', data, chunks[b'OIDF'])
+        self.count = self.fanout[255]
+        self.oids_offset = chunks[b'OIDL']
+        self.commits_offset = chunks[b'CDAT']
+        self.edges_offset = chunks.get(b'EDGE')
+
+    def find(self, oid):
+        """Return the local position of a commit id (bytes), or None."""
+        lo = self.fanout[oid[0] - 1] if oid[0] else 0
+        hi = self.fanout[oid[0]]
+        length = self.hash_length
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self.oids_offset + mid * length
+            current = self.data[start:start + length]
+            if current < oid:
+                lo = mid + 1
+            elif current > oid:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def close(self):
+        self.data.close()
+
+
+class CommitGraph:
+    """
+    The commit-graph of a repository: a single file, or a chain of layers
+    whose commit positions are numbered base layer first.
+    """
+
+    def __init__(self, objects_dir):
+        info_dir = objects_dir / 'info'
+        chain_file = info_dir / 'commit-graphs' / 'commit-graph-chain'
+        # Same lookup order as git: the single file wins over a chain
+        if (info_dir / 'commit-graph').is_file():
+            paths = [info_dir / 'commit-graph']
+        elif chain_file.is_file():
+            paths = [info_dir / 'commit-graphs' / f'graph-{name}.graph'
+                     for name in chain_file.read_text(encoding='ascii').split()]
+        else:
+            raise CommitGraphUnavailable('No commit-graph')
+
+        self.layers = []
+        self.offsets = []
+        self.count = 0
+        try:
+            for path in paths:
+                layer = CommitGraphLayer(path)
+                self.layers.append(layer)
+                self.offsets.append(self.count)
+                self.count += layer.count
+        except BaseException:
+            self.close()
+            raise
+
+    def find(self, sha):
+        """Return the global position of a commit (hex sha), or None."""
+        oid = bytes.fromhex(sha)
+        for layer, offset in zip(self.layers, self.offsets):
+            position = layer.find(oid)
+            if position is not None:
+                return offset + position
+        return None
+
+    def commit_times(self, positions):
+        """
+        Yield the commit timestamp of every commit reachable from `positions`,
+        each commit once.
+        """
+        seen = bytearray(self.count)
+        stack = list(positions)
+        single = len(self.layers) == 1
+        while stack:
+            position = stack.pop()
+            if seen[position]:
+                continue
+            seen[position] = 1
+
+            if single:
+                layer, local = self.layers[0], position
+            else:
+                index = bisect.bisect_right(self.offsets, position) - 1
+                layer, local = self.layers[index], position - self.offsets[index]
+
+            start = layer.commits_offset + local * (layer.hash_length + 16) + layer.hash_length
+            parent1, parent2, high, low = struct.unpack_from('>4I', layer.data, start)
+            yield ((high & 0x3) << 32) | low
+
+            if parent1 != COMMIT_GRAPH_NO_PARENT:
+                stack.append(parent1)
+            if parent2 == COMMIT_GRAPH_NO_PARENT:
+                continue
+            if not parent2 & COMMIT_GRAPH_EXTRA_EDGES:
+                stack.append(parent2)
+                continue
+
+            # Octopus merge: parents 2..n are listed in the extra edges chunk
+            edge = layer.edges_offset + 4 * (parent2 & ~COMMIT_GRAPH_EXTRA_EDGES)
+            while True:
+                (value,) = struct.unpack_from('>I', layer.data, edge)
+                stack.append(value & ~COMMIT_GRAPH_EXTRA_EDGES)
+                if value & COMMIT_GRAPH_EXTRA_EDGES:
+                    break
+                edge += 4
+
+    def close(self):
+        for layer in self.layers:
+            layer.close()
+
+
+def read_loose_object(objects_dir, sha):
+    """Return (type, body) of a loose object, or None if it is not loose."""
+    try:
+        with open(objects_dir / sha[:2] / sha[2:], 'rb') as f:
+            raw = zlib.decompress(f.read())
+    except FileNotFoundError:
+        return None
+    header, _, body = raw.partition(b'\0')
+    return header.split(b' ', 1)[0].decode('ascii'), body
+
+
+def read_native_refs(full_path):
+    """
+    Read the refs of a repository without git. Returns (tips, peeled):
+    `tips` matches `git show-ref --head` ({refname: sha}) and `peeled` maps
+    annotated tag refs to their target commit when packed-refs records it.
+    """
+    git_dirs = resolve_git_dirs(full_path)
+    common_dir = git_dirs[-1]
+    if (common_dir / 'reftable').exists():
+        raise CommitGraphUnavailable('reftable refs are not supported')
+
+    refs = {}
+    peeled = {}
+    packed_refs = common_dir / 'packed-refs'
+    if packed_refs.is_file():
+        last_ref = None
+        for line in packed_refs.read_text(encoding='utf-8').splitlines():
+            if line.startswith('^') and last_ref:
+                peeled[last_ref] = line[1:].strip()
+            elif line and not line.startswith('#'):
+                sha, _, last_ref = line.partition(' ')
+                refs[last_ref] = sha
+
+    # Loose refs override packed ones
+    refs_dir = common_dir / 'refs'
+    for root, _, files in os.walk(refs_dir):
+        for name in files:
+            path = Path(root) / name
+            ref = 'refs/' + path.relative_to(refs_dir).as_posix()
+            refs[ref] = path.read_text(encoding='utf-8').strip()
+            peeled.pop(ref, None)
+    refs['HEAD'] = (git_dirs[0] / 'HEAD').read_text(encoding='utf-8').strip()
+
+    def resolve(value, depth=0):
+        # Symbolic refs ("ref: refs/heads/main") point to another ref
+        while value.startswith('ref:') and depth < 5:
+            value = refs.get(value[4:].strip(), '')
+            depth += 1
+        return value if value and not value.startswith('ref:') else None
+
+    tips = {}
+    for ref, value in refs.items():
+        sha = resolve(value)
+        if sha:
+            tips[ref] = sha
+    return tips, peeled
+
+
+def scan_commit_graph(full_path, tips, peeled):
+    """
+    Count the commits reachable from `tips` by local commit date and hour,
+    from the commit-graph and loose objects only. Returns {"YYYY-MM-DD-HH": n}.
+    Raises CommitGraphUnavailable when a commit can't be resolved natively.
+    """
+    objects_dir = resolve_git_dirs(full_path)[-1] / 'objects'
+    if (objects_dir / 'info' / 'alternates').exists():
+        raise CommitGraphUnavailable('Alternate object stores are not supported')
+
+    try:
+        graph = CommitGraph(objects_dir)
+    except (OSError, ValueError, struct.error) as e:
+        raise CommitGraphUnavailable(str(e))
+
+    try:
+        # Counted per quarter hour first: every UTC offset is a multiple of it
+        quarters = {}
+        positions = set()
+        pending = [peeled.get(ref, sha) for ref, sha in tips.items()]
+        loose_seen = set()
+
+        # Commits missing from the graph must be loose: read their parents until
+        # the walk reaches the graph
+        while pending:
+            sha = pending.pop()
+            if sha in loose_seen:
+                continue
+            position = graph.find(sha)
+            if position is not None:
+                positions.add(position)
+                continue
+
+            loose_seen.add(sha)
+            obj = read_loose_object(objects_dir, sha)
+            if obj is None:
+                raise CommitGraphUnavailable(f'Commit {sha} is neither loose nor in the commit-graph')
+            obj_type, body = obj
+
+            headers = body.split(b'\n\n', 1)[0].split(b'\n')
+            if obj_type == 'tag':
+                pending.extend(line[7:].decode('ascii') for line in headers if line.startswith(b'object '))
+            elif obj_type == 'commit':
+                for line in headers:
+                    if line.startswith(b'parent '):
+                        pending.append(line[7:].decode('ascii'))
+                    elif line.startswith(b'committer '):
+                        timestamp = int(line.rsplit(b' ', 2)[1])
+                        quarters[timestamp // 900] = quarters.get(timestamp // 900, 0) + 1
+
+        for timestamp in graph.commit_times(positions):
+            quarters[timestamp // 900] = quarters.get(timestamp // 900, 0) + 1
+    except (OSError, ValueError, IndexError, struct.error, zlib.error) as e:
+        raise CommitGraphUnavailable(str(e))
+    finally:
+        graph.close()
+
+    buckets = {}
+    for quarter, count in quarters.items():
+        key = time.strftime('%Y-%m-%d-%H', time.localtime(quarter * 900))
+        buckets[key] = buckets.get(key, 0) + count
+    return buckets
+
+
+# ============================================================================
+# DENSE COMMIT HISTOGRAMS
+# ============================================================================
+# Heatmaps are handled as a dense (days x 24) matrix of counts flattened into
+# a single array: day d, hour h lives at index d * 24 + h from a base date.
+# Statistics are reductions over that matrix (NumPy when installed, stdlib
+# `array` otherwise) instead of re-parsing "YYYY-MM-DD-HH" keys.
+# Coarser views are rollup levels built once per histogram, each from the one
+# below it (hour -> day -> week/month), so a range at any resolution is summed
+# from period totals instead of hourly buckets.
+
+DAY_NAMES_FR = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
+
+# Parsed histograms per repo: {repo_id: (index updatedAt, CommitHistogram)}
+commit_histograms = {}
+
+
+HEATMAP_RESOLUTIONS = ('hour', 'day', 'week', 'month')
+
+
+def zeros_counts(size):
+    """Allocate a zeroed array of commit counts."""
+    if NUMPY_AVAILABLE:
+        return np.zeros(size, dtype=np.uint32)
+    return array('I', bytes(4 * size))
+
+
+def pack_counts(counts):
+    """
+    Return (width, data): counts as a little-endian unsigned integer array
+    of the smallest width (1, 2 or 4 bytes) able to hold the maximum.
+    """
+    peak = int(max(counts)) if len(counts) else 0
+    width = 1 if peak < 0x100 else 2 if peak < 0x10000 else 4
+
+    if NUMPY_AVAILABLE:
+        return width, np.asarray(counts).astype(f'<u{width}').tobytes()
+
+    packed = array({1: 'B', 2: 'H', 4: 'I'}[width], counts)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return width, packed.tobytes()
+
+
+def period_start(day, resolution):
+    """First day of the day/week (Monday)/month period containing `day`."""
+    if resolution == 'week':
+        return day - timedelta(days=day.weekday())
+    if resolution == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(day, resolution):
+    """First day of the period following the one starting at `day`."""
+    if resolution == 'week':
+        return day + timedelta(days=7)
+    if resolution == 'month':
+        return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return day + timedelta(days=1)
+
+
+class CommitHistogram:
+    """Hourly commit counts over consecutive days, starting at `base`."""
+
+    __slots__ = ('base', 'counts', 'levels')
+
+    resolution = 'hour'
+
+    def __init__(self, base=None, counts=None):
+        self.base = base
+        self.counts = counts if counts is not None else zeros_counts(0)
+        self.levels = {}  # rollup levels, built on first use
+
+    @property
+    def days(self):
+        return len(self.counts) // 24
+
+    @classmethod
+    def from_buckets(cls, buckets):
+        """Build a histogram from {"YYYY-MM-DD-HH": count} buckets."""
+        if not buckets:
+            return cls()
+
+        base = date.fromisoformat(min(buckets)[:10])
+        days = (date.fromisoformat(max(buckets)[:10]) - base).days + 1
+        counts = zeros_counts(days * 24)
+
+        # Each distinct day is parsed once, not once per hour bucket
+        day_offsets = {}
+        for key, count in buckets.items():
+            day = key[:10]
+            offset = day_offsets.get(day)
+            if offset is None:
+                offset = day_offsets[day] = (date.fromisoformat(day) - base).days * 24
+            counts[offset + int(key[11:13])] += count
+
+        return cls(base, counts)
+
+    @classmethod
+    def merge(cls, histograms):
+        """Sum several histograms into one covering all of their days."""
+        histograms = [h for h in histograms if h.base is not None]
+        if not histograms:
+            return cls()
+
+        base = min(h.base for h in histograms)
+        end = max(h.base + timedelta(days=h.days) for h in histograms)
+        counts = zeros_counts((end - base).days * 24)
+
+        for h in histograms:
+            offset = (h.base - base).days * 24
+            if NUMPY_AVAILABLE:
+                counts[offset:offset + len(h.counts)] += h.counts
+            else:
+                for i, count in enumerate(h.counts):
+                    if count:
+                        counts[offset + i] += count
+
+        return cls(base, counts)
+
+    @classmethod
+    def from_packed_bytes(cls, base, width, data):
+        """Rebuild a histogram from the output of to_packed_bytes()."""
+        if base is None:
+            return cls()
+
+        if NUMPY_AVAILABLE:
+            return cls(base, np.frombuffer(data, dtype=f'<u{width}').astype(np.uint32))
+
+        packed = array({1: 'B', 2: 'H', 4: 'I'}[width])
+        packed.frombytes(data)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        return cls(base, array('I', packed))
+
+    def day_range(self, since_date=None, until_date=None):
+        """Return the (start, end) day offsets of since_date <= day <= until_date."""
+        start = max((since_date - self.base).days, 0) if since_date else 0
+        end = min((until_date - self.base).days + 1, self.days) if until_date else self.days
+        return start, max(start, end)
+
+    def since(self, since_date):
+        """Return the histogram restricted to days >= since_date (a date)."""
+        return self.window(since_date)
+
+    def window(self, since_date=None, until_date=None):
+        """Return the histogram restricted to since_date <= day <= until_date (None = open)."""
+        if self.base is None:
+            return self
+
+        start, end = self.day_range(since_date, until_date)
+        if start == end:
+            return CommitHistogram()
+        if start == 0 and end == self.days:
+            return self
+        return CommitHistogram(self.base + timedelta(days=start), self.counts[start * 24:end * 24])
+
+    def rollup_level(self, resolution):
+        """
+        Return (bounds, totals) for 'day', 'week' or 'month': the day offset
+        where each period starts (the first one clipped to `base`) and its
+        commit count. Days are summed from hours, weeks and months from days.
+        """
+        level = self.levels.get(resolution)
+        if level is not None:
+            return level
+
+        if resolution == 'day':
+            level = (range(self.days), self.daily_totals())
+        else:
+            daily = self.rollup_level('day')[1]
+            bounds = [0]
+            day = next_period(period_start(self.base, resolution), resolution)
+            while (day - self.base).days < self.days:
+                bounds.append((day - self.base).days)
+                day = next_period(day, resolution)
+
+            if NUMPY_AVAILABLE:
+                totals = np.add.reduceat(daily, bounds)
+            else:
+                ends = bounds[1:] + [self.days]
+                totals = array('I', (sum(daily[lo:hi]) for lo, hi in zip(bounds, ends)))
+            level = (bounds, totals)
+
+        self.levels[resolution] = level
+        return level
+
+    def rollup(self, resolution, since_date=None, until_date=None):
+        """
+        Return the CommitRollup of the since_date..until_date window at
+        'day', 'week' or 'month' resolution. Periods cut by the window edges
+        only count the days inside it.
+        """
+        if self.base is None:
+            return CommitRollup(resolution)
+
+        start, end = self.day_range(since_date, until_date)
+        if start == end:
+            return CommitRollup(resolution)
+
+        bounds, totals = self.rollup_level(resolution)
+        daily = self.rollup_level('day')[1]
+        first = bisect.bisect_right(bounds, start) - 1
+        last = bisect.bisect_left(bounds, end)
+
+        counts = []
+        for i in range(first, last):
+            lo = bounds[i]
+            hi = bounds[i + 1] if i + 1 < len(bounds) else self.days
+            if start <= lo and hi <= end:
+                counts.append(int(totals[i]))
+            else:
+                counts.append(int(sum(daily[max(lo, start):min(hi, end)])))
+
+        base = period_start(self.base + timedelta(days=bounds[first]), resolution)
+        return CommitRollup(resolution, base, counts)
+
+    def to_commits(self):
+        """Return the sparse {"YYYY-MM-DD-HH": count} form used by the API."""
+        if self.base is None:
+            return {}
+
+        if NUMPY_AVAILABLE:
+            indexes = np.flatnonzero(self.counts)
+            pairs = zip(indexes.tolist(), self.counts[indexes].tolist())
+        else:
+            pairs = ((i, count) for i, count in enumerate(self.counts) if count)
+
+        commits = {}
+        day_prefixes = {}
+        for i, count in pairs:
+            day = i // 24
+            prefix = day_prefixes.get(day)
+            if prefix is None:
+                prefix = day_prefixes[day] = (self.base + timedelta(days=day)).isoformat()
+            commits[f'{prefix}-{i % 24:02d}'] = count
+        return commits
+
+    def to_packed_bytes(self):
+        """Return (width, data): the counts packed by pack_counts()."""
+        return pack_counts(self.counts)
+
+    def daily_totals(self):
+        """Commits per day, as a sequence of length `days`."""
+        if NUMPY_AVAILABLE:
+            return self.counts.reshape(-1, 24).sum(axis=1)
+        return [sum(self.counts[d * 24:(d + 1) * 24]) for d in range(self.days)]
+
+    def hourly_totals(self):
+        """Commits per hour of day (0-23) over the whole histogram."""
+        if NUMPY_AVAILABLE:
+            return self.counts.reshape(-1, 24).sum(axis=0)
+        return [sum(self.counts[h::24]) for h in range(24)]
+
+    def stats(self):
+        """Compute the heatmap statistics block."""
+        if self.base is None:
+            daily, hourly = [], [0] * 24
+        else:
+            daily, hourly = self.daily_totals(), self.hourly_totals()
+
+        total_commits = int(sum(hourly))
+
+        if NUMPY_AVAILABLE and self.base is not None:
+            unique_days = int(np.count_nonzero(daily))
+            peak_hour = int(np.argmax(hourly)) if total_commits else 12
+            weekdays = (np.arange(self.days) + self.base.weekday()) % 7
+            weekday_counts = np.bincount(weekdays, weights=daily, minlength=7)
+            busiest_weekday = int(np.argmax(weekday_counts)) if total_commits else 0
+        else:
+            unique_days = sum(1 for count in daily if count)
+            peak_hour = max(range(24), key=hourly.__getitem__) if total_commits else 12
+            weekday_counts = [0] * 7
+            if self.base is not None:
+                first_weekday = self.base.weekday()
+                for d, count in enumerate(daily):
+                    weekday_counts[(first_weekday + d) % 7] += count
+            busiest_weekday = max(range(7), key=weekday_counts.__getitem__) if total_commits else 0
+
+        # Current streak: consecutive active days ending today (or yesterday)
+        current_streak = 0
+        if self.base is not None:
+            today = (datetime.now().date() - self.base).days
+            end = today if 0 <= today < self.days and daily[today] else today - 1
+            if 0 <= end < self.days:
+                if NUMPY_AVAILABLE:
+                    active = daily[end::-1] > 0
+                    current_streak = int(active.size if active.all() else np.argmin(active))
+                else:
+                    while end >= 0 and daily[end]:
+                        current_streak += 1
+                        end -= 1
 
         # Average commits per active day
         avg_commits = round(total_commits / unique_days, 1) if unique_days > 0 else 0
 
-        # Build result
+        return {
+            'totalCommits': total_commits,
+            'uniqueDays': unique_days,
+            'peakHour': peak_hour,
+            'currentStreak': current_streak,
+            'busiestDay': DAY_NAMES_FR[busiest_weekday],
+            'avgCommitsPerDay': avg_commits
+        }
+
+
+class CommitRollup:
+    """Commit counts per day, week or month, one per period from the period starting at `base`."""
+
+    __slots__ = ('resolution', 'base', 'counts')
+
+    def __init__(self, resolution, base=None, counts=()):
+        self.resolution = resolution
+        self.base = base
+        self.counts = counts
+
+    @property
+    def periods(self):
+        return len(self.counts)
+
+    def to_commits(self):
+        """Return the sparse {period: count} form used by the API, keyed by period start."""
+        commits = {}
+        day = self.base
+        for count in self.counts:
+            if count:
+                key = day.strftime('%Y-%m') if self.resolution == 'month' else day.isoformat()
+                commits[key] = count
+            day = next_period(day, self.resolution)
+        return commits
+
+    def to_packed_bytes(self):
+        """Return (width, data): the counts packed by pack_counts()."""
+        return pack_counts(self.counts)
+
+
+def parse_since_date(value):
+    """Parse the `since` query param (YYYY-MM-DD). Raises ValueError if invalid."""
+    return date.fromisoformat(value) if value else None
+
+
+def parse_heatmap_query():
+    """
+    Parse the since/until/resolution query params into (since_date, window).
+    `window` is None for the plain `since` query (neither `until` nor
+    `resolution` given), which has its own cache entry; otherwise it is
+    (since_date, until_date, resolution), a view over the full-history entry.
+    Raises ValueError (with the error message).
+    """
+    try:
+        since_date = parse_since_date(request.args.get('since'))
+    except ValueError:
+        raise ValueError('Invalid since date (expected YYYY-MM-DD)')
+    try:
+        until_date = parse_since_date(request.args.get('until'))
+    except ValueError:
+        raise ValueError('Invalid until date (expected YYYY-MM-DD)')
+
+    resolution = request.args.get('resolution', 'hour')
+    if resolution not in HEATMAP_RESOLUTIONS:
+        raise ValueError('Invalid resolution (expected hour, day, week or month)')
+
+    if 'until' not in request.args and 'resolution' not in request.args:
+        return since_date, None
+    return since_date, (since_date, until_date, resolution)
+
+
+def heatmap_window(result, histogram, window):
+    """
+    Apply a (since_date, until_date, resolution) window to a full-history
+    heatmap: returns (result, histogram or CommitRollup). `stats` cover the
+    window, `totalStats` the whole history and `firstDate` tells how far
+    back it goes.
+    """
+    if window is None:
+        return result, histogram
+
+    since_date, until_date, resolution = window
+    today = datetime.now().date()
+    view = histogram.window(since_date, until_date)
+    data = view if resolution == 'hour' else histogram.rollup(resolution, since_date, until_date)
+
+    windowed = {key: value for key, value in result.items() if key not in ('commits', 'stats', 'sinceDate')}
+    windowed.update({
+        'sinceDate': (since_date or histogram.base or today).isoformat(),
+        'untilDate': (until_date or today).isoformat(),
+        'resolution': resolution,
+        'firstDate': histogram.base.isoformat() if histogram.base else None,
+        'commits': data.to_commits(),
+        'stats': view.stats(),
+        'totalStats': result['stats'],
+    })
+    return windowed, data
+
+
+# ============================================================================
+# GIT HEATMAP ENDPOINTS
+# ============================================================================
+
+# Compact heatmap wire formats (opt-in, JSON stays the default):
+# - packed: JSON where `commits` is replaced by a `packed` block holding the
+#   dense (days x 24) counts as a base64 little-endian integer array (one
+#   count per period for the day/week/month resolutions)
+# - binary: b'CGH1' + u32 LE metadata length + metadata JSON + raw counts
+HEATMAP_FORMATS = {
+    'json': 'application/json',
+    'packed': 'application/vnd.codeglyph.heatmap+json',
+    'binary': 'application/vnd.codeglyph.heatmap',
+}
+HEATMAP_BINARY_MAGIC = b'CGH1'
+
+
+def get_heatmap_format():
+    """Pick the heatmap wire format from `format=` or the Accept header."""
+    requested = request.args.get('format')
+    if requested in HEATMAP_FORMATS:
+        return requested
+
+    best = request.accept_mimetypes.best_match(list(HEATMAP_FORMATS.values()))
+    return next((name for name, mimetype in HEATMAP_FORMATS.items() if mimetype == best), 'json')
+
+
+def heatmap_response(result, histogram, fmt='json', etag=None, entry=None):
+    """
+    Serialize a heatmap result in the requested wire format, with an ETag
+    when the result is complete (partial global results are never validated).
+    With the cache `entry` of the result, the encoded body is kept in it and
+    reused by the next requests for the same format.
+    """
+    encoded = entry['bodies'].get(fmt) if entry is not None else None
+    if encoded is None:
+        body, mimetype = serialize_heatmap(result, histogram, fmt)
+        encoded = (encode_body(body), mimetype)
+        if entry is not None:
+            entry['bodies'][fmt] = encoded
+
+    response = encoded_response(encoded[0], encoded[1], etag)
+    response.vary.add('Accept')
+    return response
+
+
+def stale_heatmap_response(entry, fmt='json', window=None):
+    """
+    Serve an outdated cache entry (stale-while-revalidate): no ETag, since it
+    does not match the current version, and `Age` set to the seconds since
+    the data was last known to be current.
+    """
+    if window is None:
+        response = heatmap_response(entry['result'], entry['histogram'], fmt, entry=entry)
+    else:
+        response = heatmap_response(*heatmap_window(entry['result'], entry['histogram'], window), fmt)
+    response.headers['Age'] = str(int(time.time() - entry['validatedAt']))
+    response.headers['X-Heatmap-Stale'] = 'true'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+heatmap_refreshing = set()
+heatmap_refreshing_lock = threading.Lock()
+
+
+def schedule_heatmap_refresh(cache_key, func, *args):
+    """Recompute a stale heatmap in the background, once per key at a time."""
+    with heatmap_refreshing_lock:
+        if cache_key in heatmap_refreshing:
+            return
+        heatmap_refreshing.add(cache_key)
+
+    def refresh():
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"Heatmap refresh error ({cache_key}): {e}")
+        finally:
+            with heatmap_refreshing_lock:
+                heatmap_refreshing.discard(cache_key)
+
+    heatmap_refresh_executor.submit(refresh)
+
+
+def serialize_heatmap(result, histogram, fmt):
+    """Return (body bytes, mimetype) of a heatmap in one of HEATMAP_FORMATS."""
+    if fmt == 'json':
+        return app.json.encode(result) + b'\n', HEATMAP_FORMATS['json']
+
+    width, data = histogram.to_packed_bytes()
+    meta = {key: value for key, value in result.items() if key != 'commits'}
+    meta['packed'] = {
+        'baseDate': histogram.base.isoformat() if histogram.base else None,
+        'width': width,
+        'byteOrder': 'little'
+    }
+    if histogram.resolution == 'hour':
+        meta['packed']['days'] = histogram.days
+    else:
+        meta['packed'].update({'resolution': histogram.resolution, 'periods': histogram.periods})
+
+    if fmt == 'packed':
+        meta['packed']['data'] = base64.b64encode(data).decode('ascii')
+        return app.json.encode(meta) + b'\n', HEATMAP_FORMATS['packed']
+
+    meta_bytes = json.dumps(meta, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    body = HEATMAP_BINARY_MAGIC + struct.pack('<I', len(meta_bytes)) + meta_bytes + data
+    return body, HEATMAP_FORMATS['binary']
+
+
+def heatmap_version(*fingerprints):
+    """
+    Version tag of a heatmap result: the ref fingerprints it was computed from,
+    plus the current day since the streak statistic depends on today's date.
+    """
+    today = datetime.now().strftime('%Y-%m-%d')
+    return hashlib.sha1(f"{today}:{':'.join(fingerprints)}".encode('utf-8')).hexdigest()
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time: callers arriving while it
+    runs wait for it and share its result (or exception) instead of starting
+    their own.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}  # key -> Future of the running computation
+        self.stats = {'computed': 0, 'coalesced': 0}
+
+    def do(self, key, func, *args):
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+                self.stats['computed'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+
+# Concurrent misses of the same heatmap (key and version) share one computation
+heatmap_flights = SingleFlight()
+
+
+def get_cached_heatmap(cache_key, version, max_staleness=0):
+    """
+    Return a heatmap cache entry if still at `version` (thread-safe), from
+    heatmap_cache or else from the cache shared with the other workers.
+    With `max_staleness`, an entry at an older version that was last known
+    current less than that many seconds ago is returned too (callers tell
+    it apart by its version).
+    """
+    with heatmap_cache_lock:
+        entry = heatmap_cache.get(cache_key)
+
+    if entry is None or entry['version'] != version:
+        shared = shared_heatmap_get(cache_key)
+        if shared is not None and (entry is None or shared['validatedAt'] > entry['validatedAt']):
+            entry = shared
+            with heatmap_cache_lock:
+                heatmap_cache[cache_key] = entry
+
+    if entry is None:
+        return None
+    if entry['version'] == version:
+        entry['validatedAt'] = time.time()
+        return entry
+    if time.time() - entry['validatedAt'] <= max_staleness:
+        return entry
+    return None
+
+
+def store_cached_heatmap(cache_key, version, result, histogram):
+    """
+    Store a heatmap in heatmap_cache (and the shared cache): the API result
+    along with the dense histogram it was built from, its version and when
+    it was last known to be current.
+    """
+    entry = {'version': version, 'result': result, 'histogram': histogram, 'validatedAt': time.time(), 'bodies': {}}
+    with heatmap_cache_lock:
+        heatmap_cache[cache_key] = entry
+    shared_heatmap_put(cache_key, entry)
+    return entry
+
+
+# Shared cache rows: the result without `commits` (rebuilt from the packed
+# histogram), keyed by cache key and replaced when the version changes
+HEATMAP_SHARED_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS heatmaps_v2 (
+        key TEXT PRIMARY KEY,
+        version TEXT NOT NULL,
+        validated_at REAL NOT NULL,
+        meta TEXT NOT NULL,
+        base TEXT,
+        width INTEGER NOT NULL,
+        counts BLOB NOT NULL,
+        last_used REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS heatmaps_v2_last_used ON heatmaps_v2 (last_used);
+    DROP TABLE IF EXISTS heatmaps;
+"""
+
+
+def shared_heatmap_get(cache_key):
+    """Load the heatmap entry of a key from the shared cache, whatever its version (None on miss or error)."""
+    if HEATMAP_SHARED_CACHE_MAX_ENTRIES <= 0:
+        return None
+    try:
+        conn = get_sqlite_connection(HEATMAP_SHARED_CACHE_FILE, HEATMAP_SHARED_CACHE_SCHEMA)
+        row = conn.execute(
+            'SELECT version, validated_at, meta, base, width, counts FROM heatmaps_v2 WHERE key = ?',
+            (cache_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute('UPDATE heatmaps_v2 SET last_used = ? WHERE key = ?', (time.time(), cache_key))
+    except sqlite3.Error as e:
+        print(f"Heatmap cache error: {e}")
+        return None
+
+    version, validated_at, meta, base, width, counts = row
+    histogram = CommitHistogram.from_packed_bytes(date.fromisoformat(base) if base else None, width, counts)
+    result = json.loads(meta)
+    result['commits'] = histogram.to_commits()
+    return {'version': version, 'result': result, 'histogram': histogram, 'validatedAt': validated_at, 'bodies': {}}
+
+
+def shared_heatmap_put(cache_key, entry):
+    """Write a heatmap entry to the shared cache, evicting the least recently used rows."""
+    if HEATMAP_SHARED_CACHE_MAX_ENTRIES <= 0:
+        return
+    histogram = entry['histogram']
+    width, counts = histogram.to_packed_bytes()
+    meta = json.dumps({k: v for k, v in entry['result'].items() if k != 'commits'}, ensure_ascii=False)
+    try:
+        conn = get_sqlite_connection(HEATMAP_SHARED_CACHE_FILE, HEATMAP_SHARED_CACHE_SCHEMA)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO heatmaps_v2 (key, version, validated_at, meta, base, width, counts, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (cache_key, entry['version'], entry['validatedAt'], meta,
+                 histogram.base.isoformat() if histogram.base else None, width, counts, time.time())
+            )
+            trim_lru_table(conn, 'heatmaps_v2', HEATMAP_SHARED_CACHE_MAX_ENTRIES)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+    except sqlite3.Error as e:
+        print(f"Heatmap cache error: {e}")
+
+
+HEATMAP_LOCK_RETRY = 0.05  # seconds between two attempts at a busy heatmap lock
+
+
+@contextmanager
+def heatmap_process_lock(cache_key, timeout=None):
+    """
+    Serialize the computation of a heatmap across worker processes (flock on a
+    file under DATA_DIR), so only one of them runs git for a given key.
+    Raises subprocess.TimeoutExpired when the lock is still held by another
+    process after `timeout` seconds (None waits indefinitely).
+    No-op without fcntl or when the shared cache is disabled.
+    """
+    if fcntl is None or HEATMAP_SHARED_CACHE_MAX_ENTRIES <= 0:
+        yield
+        return
+
+    HEATMAP_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+    lock_name = hashlib.sha1(cache_key.encode('utf-8')).hexdigest()[:16]
+    with open(HEATMAP_LOCK_DIR / f'{lock_name}.lock', 'a') as lock_file:
+        if timeout is None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise subprocess.TimeoutExpired('flock', timeout)
+                    time.sleep(HEATMAP_LOCK_RETRY)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_repo_heatmap(repo, since_date=None, timeout=30, fingerprint=None):
+    """
+    Return the heatmap cache entry of a single repository, computing and
+    caching it when missing or when the repository refs have changed.
+    Raises RuntimeError or subprocess.TimeoutExpired if git fails.
+    """
+    full_path = Path(GIT_REPOS_BASE) / repo['path']
+    if fingerprint is None:
+        fingerprint = get_repo_fingerprint(full_path)
+
+    cache_key = f"{repo['id']}:{since_date or 'all'}"
+    version = heatmap_version(fingerprint)
+    cached = get_cached_heatmap(cache_key, version)
+    if cached is not None:
+        return cached
+
+    return heatmap_flights.do(
+        (cache_key, version), compute_repo_heatmap, repo, since_date, timeout, fingerprint, cache_key, version
+    )
+
+
+def compute_repo_heatmap(repo, since_date, timeout, fingerprint, cache_key, version):
+    """Compute the heatmap of a repository and store it in heatmap_cache."""
+    with heatmap_process_lock(cache_key, timeout):
+        # Another worker may have computed it while we waited for the lock
+        cached = get_cached_heatmap(cache_key, version)
+        if cached is not None:
+            return cached
+
+        full_path = Path(GIT_REPOS_BASE) / repo['path']
+        histogram = get_repo_histogram(repo['id'], full_path, since_date, timeout, fingerprint)
+
         result = {
-            'repo': 'global',
-            'repoName': f'Global ({repo_count} repos)',
-            'sinceDate': since_date,
-            'commits': all_commits,
-            'stats': {
-                'totalCommits': total_commits,
-                'uniqueDays': unique_days,
-                'peakHour': int(peak_hour),
-                'currentStreak': current_streak,
-                'busiestDay': busiest_day,
-                'avgCommitsPerDay': avg_commits
-            }
+            'repo': repo['path'],
+            'repoName': full_path.name,
+            # Default to the first commit date if no since parameter
+            'sinceDate': (since_date or histogram.base or datetime.now().date()).isoformat(),
+            'resolution': 'hour',
+            'commits': histogram.to_commits(),
+            'stats': histogram.stats()
         }
 
-        # Store in cache before returning
-        with heatmap_cache_lock:
-            heatmap_cache[cache_key] = result
+        return store_cached_heatmap(cache_key, version, result, histogram)
+
+
+def fingerprint_repos(repos):
+    """Return {repo id: ref fingerprint} for the managed repos present on disk."""
+    fingerprints = {}
+    for repo in repos:
+        full_path = Path(GIT_REPOS_BASE) / repo['path']
+
+        if not (full_path / '.git').exists():
+            continue
+
+        fingerprints[repo['id']] = get_repo_fingerprint(full_path)
+    return fingerprints
+
+
+def global_heatmap_version(fingerprints, since_date=None):
+    """Return the (cache key, version) of the global heatmap for these repos."""
+    cache_key = f"global:{since_date or 'all'}"
+    version = heatmap_version(*(f'{repo_id}={fp}' for repo_id, fp in sorted(fingerprints.items())))
+    return cache_key, version
+
+
+def build_global_heatmap(repos, fingerprints, since_date=None):
+    """
+    Return (result, histogram, failed_repos) for the global heatmap, from
+    heatmap_cache when current. Repos already cached are reused and the
+    missing ones are computed concurrently; complete results are cached.
+    `result` is None when no repository could be scanned.
+    """
+    cache_key, version = global_heatmap_version(fingerprints, since_date)
+    cached = get_cached_heatmap(cache_key, version)
+    if cached is not None:
+        return cached['result'], cached['histogram'], []
+
+    return heatmap_flights.do(
+        (cache_key, version), compute_global_heatmap, repos, fingerprints, since_date, cache_key, version
+    )
+
+
+def compute_global_heatmap(repos, fingerprints, since_date, cache_key, version):
+    """Merge the per-repo heatmaps into the global one (see build_global_heatmap)."""
+    # Reuse cached per-repo results, fan out the missing ones
+    repo_entries = {}
+    futures = {}
+    for repo in repos:
+        fingerprint = fingerprints.get(repo['id'])
+        if fingerprint is None:
+            continue
+
+        cached = get_cached_heatmap(f"{repo['id']}:{since_date or 'all'}", heatmap_version(fingerprint))
+        if cached is not None:
+            repo_entries[repo['id']] = cached
+        else:
+            futures[repo['id']] = heatmap_scan_executor.submit(
+                get_repo_heatmap, repo, since_date, HEATMAP_REPO_TIMEOUT, fingerprint
+            )
+
+    # One deadline for the whole fan-out (queueing and lock waits included);
+    # scans still running past it finish in the background and fill the cache
+    deadline = time.monotonic() + HEATMAP_REPO_TIMEOUT
+    failed_repos = []
+    for repo_id, future in futures.items():
+        try:
+            repo_entries[repo_id] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except (subprocess.TimeoutExpired, FutureTimeoutError):
+            failed_repos.append({'id': repo_id, 'reason': 'timeout'})
+        except (RuntimeError, OSError):
+            failed_repos.append({'id': repo_id, 'reason': 'git'})
+
+    if not repo_entries:
+        return None, None, failed_repos
+
+    # Merge the per-repo hourly histograms
+    histogram = CommitHistogram.merge(entry['histogram'] for entry in repo_entries.values())
+
+    # Build result
+    result = {
+        'repo': 'global',
+        'repoName': f'Global ({len(repo_entries)} repos)',
+        'sinceDate': (since_date or histogram.base or datetime.now().date()).isoformat(),
+        'resolution': 'hour',
+        'commits': histogram.to_commits(),
+        'stats': histogram.stats(),
+        'partial': bool(failed_repos),
+        'failedRepos': failed_repos
+    }
+
+    # Store in cache (only complete results)
+    if not failed_repos:
+        store_cached_heatmap(cache_key, version, result, histogram)
+    return result, histogram, failed_repos
+
+
+@app.route('/api/git/heatmap/global', methods=['GET'])
+def get_global_heatmap():
+    """
+    Get aggregated commit heatmap data for all managed repositories.
+    Returns commits grouped by date and hour (0-23).
+
+    The global view is a merge of the per-repo histograms: repos already in
+    heatmap_cache are reused, the missing ones are computed concurrently
+    (HEATMAP_SCAN_WORKERS at a time) and cached for their own endpoint.
+    The global entry is invalidated as soon as any repository changes.
+    A repo that fails or is not ready within HEATMAP_REPO_TIMEOUT (one
+    deadline for the whole fan-out) is left out and listed in `failedRepos`,
+    with `partial` set; partial results are not cached.
+    An entry outdated for less than HEATMAP_MAX_STALENESS seconds is served
+    at once (with `Age` and `X-Heatmap-Stale`) while it is rebuilt in the background.
+
+    Query params:
+    - since: Start date in YYYY-MM-DD format (optional, defaults to earliest first commit)
+    - until: End date in YYYY-MM-DD format, inclusive (optional, defaults to today)
+    - resolution: hour (default), day, week or month
+    - format: json (default), packed or binary (also negotiable through Accept)
+    """
+    data = load_repos()
+    repos = data.get('repos', [])
+
+    if not repos:
+        return jsonify({'error': 'No repositories configured'}), 404
+
+    try:
+        since_date, window = parse_heatmap_query()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Windowed queries are views over the full-history entry
+    if window is not None:
+        since_date = None
+
+    try:
+        # Fingerprint every repo (stat calls only) to validate cached entries
+        fingerprints = fingerprint_repos(repos)
+
+        if not fingerprints:
+            return jsonify({'error': 'No valid repositories found'}), 404
 
-        return jsonify(result)
+        # The version alone answers conditional requests, before any git work
+        cache_key, version = global_heatmap_version(fingerprints, since_date)
+        fmt = get_heatmap_format()
+        etag = make_etag(cache_key, version, fmt, *(window or ()))
+        unchanged = not_modified(etag)
+        if unchanged:
+            unchanged.vary.add('Accept')
+            return unchanged
+
+        # Serve a recently outdated entry at once and refresh it in the background
+        entry = get_cached_heatmap(cache_key, version, HEATMAP_MAX_STALENESS)
+        if entry is not None and entry['version'] != version:
+            schedule_heatmap_refresh(cache_key, build_global_heatmap, repos, fingerprints, since_date)
+            return stale_heatmap_response(entry, fmt, window)
+        if entry is not None and window is None:
+            return heatmap_response(entry['result'], entry['histogram'], fmt, etag, entry)
+
+        result, histogram, failed_repos = build_global_heatmap(repos, fingerprints, since_date)
+
+        if result is None:
+            timed_out = any(f['reason'] == 'timeout' for f in failed_repos)
+            return jsonify({'error': 'No valid repositories found', 'failedRepos': failed_repos}), 504 if timed_out else 404
+
+        # Partial results are never validated (nor cached)
+        result, histogram = heatmap_window(result, histogram, window)
+        return heatmap_response(result, histogram, fmt, None if failed_repos else etag)
 
     except subprocess.TimeoutExpired:
         return jsonify({'error': 'Request timeout'}), 504
@@ -682,188 +3178,180 @@ def get_global_heatmap():
 @app.route('/api/git/heatmap/<repo_id>', methods=['GET'])
 def get_heatmap(repo_id):
     """
-    Get commit heatmap data for a repository with 5-minute cache.
+    Get commit heatmap data for a repository, cached until its refs change.
     Returns commits grouped by date and hour (0-23).
 
     Query params:
     - since: Start date in YYYY-MM-DD format (optional, defaults to first commit)
+    - until: End date in YYYY-MM-DD format, inclusive (optional, defaults to today)
+    - resolution: hour (default), day, week or month
+    - format: json (default), packed or binary (also negotiable through Accept)
     """
     # Find the repo path from stored repos data
-    data = load_repos()
-    repo = next((r for r in data.get('repos', []) if r['id'] == repo_id), None)
+    repo = get_repo(repo_id)
 
     if not repo:
         return jsonify({'error': 'Repository not found'}), 404
 
-    repo_path = repo['path']
-    full_path = Path(GIT_REPOS_BASE) / repo_path
+    full_path = Path(GIT_REPOS_BASE) / repo['path']
 
     if not (full_path / '.git').exists():
         return jsonify({'error': 'Repository not found'}), 404
 
-    since_date = request.args.get('since', None)
-
-    # Check cache first (thread-safe)
-    cache_key = f"{repo_id}:{since_date or 'all'}"
-    with heatmap_cache_lock:
-        if cache_key in heatmap_cache:
-            return jsonify(heatmap_cache[cache_key])
-
     try:
-        # Build git log command
-        git_cmd = [
-            'git', '-C', str(full_path),
-            'log', '--all',
-            '--format=%ad',
-            '--date=format-local:%Y-%m-%d %H'
-        ]
+        since_date, window = parse_heatmap_query()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-        if since_date:
-            git_cmd.append(f'--since={since_date}')
+    # Windowed queries are views over the full-history entry
+    if window is not None:
+        since_date = None
 
-        result = subprocess.run(
-            git_cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-
-        if result.returncode != 0:
-            return jsonify({'error': 'Git command failed'}), 500
-
-        # Parse commits
-        commits = {}
-        lines = result.stdout.strip().split('\n')
+    try:
+        fingerprint = get_repo_fingerprint(full_path)
+        cache_key = f"{repo_id}:{since_date or 'all'}"
+        version = heatmap_version(fingerprint)
+        fmt = get_heatmap_format()
+        etag = make_etag(cache_key, version, fmt, *(window or ()))
+        unchanged = not_modified(etag)
+        if unchanged:
+            unchanged.vary.add('Accept')
+            return unchanged
+
+        # Serve a recently outdated entry at once and refresh it in the background
+        entry = get_cached_heatmap(cache_key, version, HEATMAP_MAX_STALENESS)
+        if entry is not None and entry['version'] != version:
+            schedule_heatmap_refresh(cache_key, get_repo_heatmap, repo, since_date, HEATMAP_REPO_TIMEOUT, fingerprint)
+            return stale_heatmap_response(entry, fmt, window)
+
+        entry = get_repo_heatmap(repo, since_date, fingerprint=fingerprint)
+        if window is None:
+            return heatmap_response(entry['result'], entry['histogram'], fmt, etag, entry)
+        result, histogram = heatmap_window(entry['result'], entry['histogram'], window)
+        return heatmap_response(result, histogram, fmt, etag)
+
+    except RuntimeError:
+        return jsonify({'error': 'Git command failed'}), 500
+    except subprocess.TimeoutExpired:
+        return jsonify({'error': 'Request timeout'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        for line in lines:
-            if not line:
-                continue
-            parts = line.split(' ')
-            if len(parts) >= 2:
-                date = parts[0]
-                hour = parts[1]
-                key = f"{date}-{hour}"
-                commits[key] = commits.get(key, 0) + 1
-
-        # Get first commit date if no since parameter
-        if not since_date:
-            first_cmd = [
-                'git', '-C', str(full_path),
-                'log', '--all', '--reverse',
-                '--format=%ad',
-                '--date=format-local:%Y-%m-%d',
-            ]
-            first_result = subprocess.run(first_cmd, capture_output=True, text=True, timeout=10)
-            first_lines = first_result.stdout.strip().split('\n')
-            since_date = first_lines[0] if first_lines and first_lines[0] else datetime.now().strftime('%Y-%m-%d')
-
-        # Calculate statistics
-        total_commits = sum(commits.values())
-        unique_dates = set(k.rsplit('-', 1)[0] for k in commits.keys()) if commits else set()
-        unique_days = len(unique_dates)
-
-        # Find peak hour
-        hour_counts = {}
-        for key, count in commits.items():
-            hour = key.split('-')[-1]
-            hour_counts[hour] = hour_counts.get(hour, 0) + count
-        peak_hour = max(hour_counts, key=hour_counts.get) if hour_counts else '12'
-
-        # Calculate current streak (consecutive days up to today)
-        current_streak = 0
-        if unique_dates:
-            today = datetime.now().date()
-            check_date = today
-            sorted_dates = sorted(unique_dates, reverse=True)
-            date_set = set(sorted_dates)
-
-            # Check if today or yesterday has commits (streak can include today)
-            while check_date.isoformat() in date_set:
-                current_streak += 1
-                check_date = check_date - timedelta(days=1)
-
-            # If no commits today, check from yesterday
-            if current_streak == 0:
-                check_date = today - timedelta(days=1)
-                while check_date.isoformat() in date_set:
-                    current_streak += 1
-                    check_date = check_date - timedelta(days=1)
-
-        # Find busiest day of week
-        day_names_fr = ['Lundi', 'Mardi', 'Mercredi', 'Jeudi', 'Vendredi', 'Samedi', 'Dimanche']
-        weekday_counts = {i: 0 for i in range(7)}
-        for key, count in commits.items():
-            date_str = key.rsplit('-', 1)[0]
-            try:
-                date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                weekday_counts[date_obj.weekday()] += count
-            except ValueError:
-                pass
-        busiest_weekday = max(weekday_counts, key=weekday_counts.get) if any(weekday_counts.values()) else 0
-        busiest_day = day_names_fr[busiest_weekday]
 
-        # Average commits per active day
-        avg_commits = round(total_commits / unique_days, 1) if unique_days > 0 else 0
+# ============================================================================
+# HEATMAP WARM-UP
+# ============================================================================
+# A background thread precomputes the heatmap of every managed repo and the
+# global view at startup, then re-checks them every HEATMAP_WARM_INTERVAL
+# seconds (or right away when repos are added/removed). A pass over unchanged
+# repos only costs the fingerprint stat() calls, so request handlers almost
+# always find a warm cache. Progress is reported by /api/health.
+
+heatmap_warmer_state = {
+    'enabled': HEATMAP_WARM_INTERVAL > 0,
+    'ready': False,
+    'running': False,
+    'reposTotal': 0,
+    'reposDone': 0,
+    'failedRepos': [],
+    'lastRun': None,
+    'lastDuration': None,
+    'lastError': None
+}
+heatmap_warmer_lock = threading.Lock()
+heatmap_warmer_wakeup = threading.Event()
+
+
+def update_warmer_state(**changes):
+    with heatmap_warmer_lock:
+        heatmap_warmer_state.update(changes)
+
+
+def warm_heatmaps():
+    """Compute (or validate) the cached heatmap of every repo and of the global view."""
+    started = time.monotonic()
+    repos = load_repos().get('repos', [])
+    fingerprints = fingerprint_repos(repos)
+    update_warmer_state(running=True, reposTotal=len(fingerprints), reposDone=0)
+
+    # One repo at a time: the warm-up must not compete with request threads
+    failed_repos = []
+    done = 0
+    for repo in repos:
+        fingerprint = fingerprints.get(repo['id'])
+        if fingerprint is None:
+            continue
+        try:
+            get_repo_heatmap(repo, None, HEATMAP_REPO_TIMEOUT, fingerprint)
+        except subprocess.TimeoutExpired:
+            failed_repos.append({'id': repo['id'], 'reason': 'timeout'})
+        except (RuntimeError, OSError):
+            failed_repos.append({'id': repo['id'], 'reason': 'git'})
+        done += 1
+        update_warmer_state(reposDone=done)
+
+    if fingerprints:
+        # Every repo is cached by now: this only merges the histograms
+        build_global_heatmap(repos, fingerprints)
+
+    update_warmer_state(
+        ready=True,
+        running=False,
+        failedRepos=failed_repos,
+        lastRun=datetime.utcnow().isoformat() + 'Z',
+        lastDuration=round(time.monotonic() - started, 3),
+        lastError=None
+    )
+
+
+def heatmap_warmer_loop():
+    while True:
+        heatmap_warmer_wakeup.clear()
+        try:
+            warm_heatmaps()
+        except Exception as e:
+            update_warmer_state(running=False, lastError=str(e))
+        heatmap_warmer_wakeup.wait(HEATMAP_WARM_INTERVAL)
 
-        # Build result
-        result = {
-            'repo': repo_path,
-            'repoName': full_path.name,
-            'sinceDate': since_date,
-            'commits': commits,
-            'stats': {
-                'totalCommits': total_commits,
-                'uniqueDays': unique_days,
-                'peakHour': int(peak_hour),
-                'currentStreak': current_streak,
-                'busiestDay': busiest_day,
-                'avgCommitsPerDay': avg_commits
-            }
-        }
 
-        # Store in cache before returning
-        with heatmap_cache_lock:
-            heatmap_cache[cache_key] = result
+def wake_heatmap_warmer():
+    """Ask the warm-up thread for an immediate pass (after repos changed)."""
+    heatmap_warmer_wakeup.set()
 
-        return jsonify(result)
 
-    except subprocess.TimeoutExpired:
-        return jsonify({'error': 'Request timeout'}), 504
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+if HEATMAP_WARM_INTERVAL > 0:
+    threading.Thread(target=heatmap_warmer_loop, name='heatmap-warmer', daemon=True).start()
 
 
 # ============================================================================
 # SERVICE CARDS CRUD API
 # ============================================================================
 
+cards_store = open_document_store(CARDS_FILE, 'cards', {'cards': []})
+
 def load_cards():
-    """Load cards from JSON file."""
-    if CARDS_FILE.exists():
-        with open(CARDS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'cards': []}
-
-def save_cards(data):
-    """Save cards to JSON file."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CARDS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """Load cards (shared document, read-only)."""
+    return cards_store.read()
 
 @app.route('/api/cards', methods=['GET'])
 def get_cards():
     """List all service cards."""
-    data = load_cards()
-    # Sort by order and ensure public field exists (migration)
-    cards = sorted(data.get('cards', []), key=lambda x: x.get('order', 999))
-    for card in cards:
-        card.setdefault('public', True)
-    return jsonify({'cards': cards})
+    version, last_modified = cards_store.version()
+    etag = make_etag('cards', version)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    def build():
+        # Sort by order and ensure public field exists (migration)
+        cards = sorted(load_cards().get('cards', []), key=lambda x: x.get('order', 999))
+        return {'cards': [dict(card, public=card.get('public', True)) for card in cards]}
+
+    return cached_json_response('cards', etag, build, last_modified)
 
 @app.route('/api/cards', methods=['POST'])
 def create_card():
     """Create a new service card with auto-translation."""
-    data = load_cards()
     new_card = request.get_json()
 
     # Validate required fields
@@ -877,68 +3365,77 @@ def create_card():
     if source_lang not in SUPPORTED_LANGUAGES:
         source_lang = 'fr'
 
-    # Generate ID and set defaults
-    new_card['id'] = str(uuid.uuid4())[:8]
-    new_card.setdefault('icon', 'icons/default.svg')
-    new_card.setdefault('order', len(data['cards']) + 1)
-    new_card.setdefault('public', True)
-
     # Handle bilingual description - auto-translate if string provided
     description = new_card.get('description', '')
     new_card['description'] = make_bilingual_description(description, source_lang)
 
-    data['cards'].append(new_card)
-    save_cards(data)
+    with cards_store.transaction() as data:
+        # Generate ID and set defaults
+        new_card['id'] = str(uuid.uuid4())[:8]
+        new_card.setdefault('icon', 'icons/default.svg')
+        new_card.setdefault('order', len(data['cards']) + 1)
+        new_card.setdefault('public', True)
+        flag_pending_translation(new_card)
+
+        data['cards'].append(new_card)
 
+    queue_translation(cards_store, new_card)
     return jsonify(new_card), 201
 
 @app.route('/api/cards/<card_id>', methods=['GET'])
 def get_card(card_id):
     """Get a single card by ID."""
-    data = load_cards()
-    card = next((c for c in data['cards'] if c['id'] == card_id), None)
+    version, last_modified = cards_store.version()
+    etag = make_etag('cards', version, card_id)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    card = cards_store.get(card_id)
     if not card:
         return jsonify({'error': 'Carte non trouvee'}), 404
-    return jsonify(card)
+    return with_validators(jsonify(card), etag, last_modified)
 
 @app.route('/api/cards/<card_id>', methods=['PUT'])
 def update_card(card_id):
     """Update an existing card with auto-translation."""
-    data = load_cards()
-    card_index = next((i for i, c in enumerate(data['cards']) if c['id'] == card_id), None)
-
-    if card_index is None:
+    if not cards_store.get(card_id):
         return jsonify({'error': 'Carte non trouvee'}), 404
 
     updates = request.get_json()
-    current_card = data['cards'][card_index]
 
     # Get source language from request (default to 'fr')
     source_lang = updates.pop('source_lang', 'fr')
     if source_lang not in SUPPORTED_LANGUAGES:
         source_lang = 'fr'
 
-    # Handle description update with auto-translation
-    new_description = updates.get('description')
-    if new_description is not None:
-        if isinstance(new_description, str):
-            # Check if description actually changed (compare against current source language)
-            current_desc = current_card.get('description', {})
-            current_source = current_desc.get(source_lang, '') if isinstance(current_desc, dict) else current_desc
-
-            if new_description != current_source:
-                # Description changed, translate it
-                updates['description'] = make_bilingual_description(new_description, source_lang)
-            else:
-                # Keep existing translations
-                updates['description'] = current_desc
-
-    # Preserve ID
-    updates['id'] = card_id
-    data['cards'][card_index].update(updates)
-    save_cards(data)
-
-    return jsonify(data['cards'][card_index])
+    with cards_store.transaction() as data:
+        current_card = next((c for c in data['cards'] if c['id'] == card_id), None)
+        if current_card is None:
+            return jsonify({'error': 'Carte non trouvee'}), 404
+
+        # Handle description update with auto-translation
+        new_description = updates.get('description')
+        if new_description is not None:
+            if isinstance(new_description, str):
+                # Check if description actually changed (compare against current source language)
+                current_desc = current_card.get('description', {})
+                current_source = current_desc.get(source_lang, '') if isinstance(current_desc, dict) else current_desc
+
+                if new_description != current_source:
+                    # Description changed, translate it
+                    updates['description'] = make_bilingual_description(new_description, source_lang)
+                else:
+                    # Keep existing translations
+                    updates['description'] = current_desc
+
+        # Preserve ID
+        updates['id'] = card_id
+        current_card.update(updates)
+        flag_pending_translation(current_card)
+
+    queue_translation(cards_store, current_card)
+    return jsonify(current_card)
 
 def delete_uploaded_icon(icon_path):
     """Delete an uploaded icon file if it exists and is not a default icon."""
@@ -959,25 +3456,22 @@ def delete_uploaded_icon(icon_path):
 @app.route('/api/cards/<card_id>', methods=['DELETE'])
 def delete_card(card_id):
     """Delete a card and its uploaded icon."""
-    data = load_cards()
+    with cards_store.transaction() as data:
+        # Find the card to get its icon path before deletion
+        card_to_delete = next((c for c in data['cards'] if c['id'] == card_id), None)
+        if not card_to_delete:
+            return jsonify({'error': 'Carte non trouvee'}), 404
 
-    # Find the card to get its icon path before deletion
-    card_to_delete = next((c for c in data['cards'] if c['id'] == card_id), None)
-    if not card_to_delete:
-        return jsonify({'error': 'Carte non trouvee'}), 404
+        # Remove the card
+        data['cards'] = [c for c in data['cards'] if c['id'] != card_id]
 
-    # Delete the uploaded icon
+    # Delete the uploaded icon once the card is gone
     delete_uploaded_icon(card_to_delete.get('icon'))
-
-    # Remove the card
-    data['cards'] = [c for c in data['cards'] if c['id'] != card_id]
-    save_cards(data)
     return jsonify({'success': True})
 
 @app.route('/api/cards/reorder', methods=['POST'])
 def reorder_cards():
     """Reorder cards. Expects array of {id, order} objects."""
-    data = load_cards()
     order_data = request.get_json()
 
     if not isinstance(order_data, list):
@@ -985,40 +3479,37 @@ def reorder_cards():
 
     order_map = {item['id']: item['order'] for item in order_data}
 
-    for card in data['cards']:
-        if card['id'] in order_map:
-            card['order'] = order_map[card['id']]
+    with cards_store.transaction() as data:
+        for card in data['cards']:
+            if card['id'] in order_map:
+                card['order'] = order_map[card['id']]
 
-    save_cards(data)
     return jsonify({'success': True})
 
 # ============================================================================
 # SAAS CRUD API
 # ============================================================================
 
+saas_store = open_document_store(SAAS_FILE, 'saas', {'saas': []})
+
 def load_saas():
-    """Load SaaS from JSON file."""
-    if SAAS_FILE.exists():
-        with open(SAAS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {'saas': []}
-
-def save_saas(data):
-    """Save SaaS to JSON file."""
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    with open(SAAS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """Load SaaS (shared document, read-only)."""
+    return saas_store.read()
 
 @app.route('/api/saas', methods=['GET'])
 def get_saas():
     """List all SaaS."""
-    data = load_saas()
-    return jsonify({'saas': data.get('saas', [])})
+    version, last_modified = saas_store.version()
+    etag = make_etag('saas', version)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    return cached_json_response('saas', etag, lambda: {'saas': load_saas().get('saas', [])}, last_modified)
 
 @app.route('/api/saas', methods=['POST'])
 def create_saas():
     """Create a new SaaS entry with auto-translation."""
-    data = load_saas()
     new_saas = request.get_json()
 
     # Validate required fields (only icon is required)
@@ -1039,74 +3530,84 @@ def create_saas():
     description = new_saas.get('description', '')
     new_saas['description'] = make_bilingual_description(description, source_lang)
 
-    data['saas'].append(new_saas)
-    save_saas(data)
+    flag_pending_translation(new_saas)
+    with saas_store.transaction() as data:
+        data['saas'].append(new_saas)
 
+    queue_translation(saas_store, new_saas)
     return jsonify(new_saas), 201
 
 @app.route('/api/saas/<saas_id>', methods=['GET'])
 def get_saas_by_id(saas_id):
     """Get a single SaaS by ID."""
-    data = load_saas()
-    saas = next((s for s in data['saas'] if s['id'] == saas_id), None)
+    version, last_modified = saas_store.version()
+    etag = make_etag('saas', version, saas_id)
+    cached = not_modified(etag, last_modified)
+    if cached:
+        return cached
+
+    saas = saas_store.get(saas_id)
     if not saas:
         return jsonify({'error': 'SaaS non trouve'}), 404
-    return jsonify(saas)
+    return with_validators(jsonify(saas), etag, last_modified)
 
 @app.route('/api/saas/<saas_id>', methods=['PUT'])
 def update_saas(saas_id):
     """Update an existing SaaS with auto-translation."""
-    data = load_saas()
-    saas_index = next((i for i, s in enumerate(data['saas']) if s['id'] == saas_id), None)
-
-    if saas_index is None:
+    if not saas_store.get(saas_id):
         return jsonify({'error': 'SaaS non trouve'}), 404
 
     updates = request.get_json()
-    current_saas = data['saas'][saas_index]
 
     # Get source language from request (default to 'fr')
     source_lang = updates.pop('source_lang', 'fr')
     if source_lang not in SUPPORTED_LANGUAGES:
         source_lang = 'fr'
 
-    # Handle description update with auto-translation
-    new_description = updates.get('description')
-    if new_description is not None:
-        if isinstance(new_description, str):
-            current_desc = current_saas.get('description', {})
-            current_source = current_desc.get(source_lang, '') if isinstance(current_desc, dict) else current_desc
+    with saas_store.transaction() as data:
+        current_saas = next((s for s in data['saas'] if s['id'] == saas_id), None)
+        if current_saas is None:
+            return jsonify({'error': 'SaaS non trouve'}), 404
 
-            if new_description != current_source:
-                updates['description'] = make_bilingual_description(new_description, source_lang)
-            else:
-                updates['description'] = current_desc
+        # Handle description update with auto-translation
+        new_description = updates.get('description')
+        if new_description is not None:
+            if isinstance(new_description, str):
+                current_desc = current_saas.get('description', {})
+                current_source = current_desc.get(source_lang, '') if isinstance(current_desc, dict) else current_desc
 
-    # Preserve ID
-    updates['id'] = saas_id
-    data['saas'][saas_index].update(updates)
-    save_saas(data)
+                if new_description != current_source:
+                    updates['description'] = make_bilingual_description(new_description, source_lang)
+                else:
+                    updates['description'] = current_desc
 
-    return jsonify(data['saas'][saas_index])
+        # Preserve ID
+        updates['id'] = saas_id
+        current_saas.update(updates)
+        flag_pending_translation(current_saas)
+
+    queue_translation(saas_store, current_saas)
+    return jsonify(current_saas)
 
 @app.route('/api/saas/<saas_id>', methods=['DELETE'])
 def delete_saas(saas_id):
     """Delete a SaaS and its uploaded icon."""
-    data = load_saas()
+    with saas_store.transaction() as data:
+        # Find the SaaS to get its icon path before deletion
+        saas_to_delete = next((s for s in data['saas'] if s['id'] == saas_id), None)
+        if not saas_to_delete:
+            return jsonify({'error': 'SaaS non trouve'}), 404
 
-    # Find the SaaS to get its icon path before deletion
-    saas_to_delete = next((s for s in data['saas'] if s['id'] == saas_id), None)
-    if not saas_to_delete:
-        return jsonify({'error': 'SaaS non trouve'}), 404
+        # Remove the SaaS
+        data['saas'] = [s for s in data['saas'] if s['id'] != saas_id]
 
-    # Delete the uploaded icon
+    # Delete the uploaded icon once the SaaS is gone
     delete_uploaded_icon(saas_to_delete.get('icon'))
-
-    # Remove the SaaS
-    data['saas'] = [s for s in data['saas'] if s['id'] != saas_id]
-    save_saas(data)
     return jsonify({'success': True})
 
+# Entities left pending by a previous run get their translation jobs back
+translation_executor.submit(resume_pending_translations)
+
 # ============================================================================
 # ICON UPLOAD API
 # ============================================================================
@@ -1163,47 +3664,568 @@ def upload_icon():
 # SYSTEM MONITORING API
 # ============================================================================
 
+# The status file is parsed once per change (stat() key: inode, mtime, size)
+# and kept with its pre-encoded response bodies, so a poll costs a stat().
+# A read that fails (file missing or caught half-written) keeps serving the
+# last good snapshot; `stale` tells when the collector stopped updating it.
+
+system_status_snapshot = {'current': None}
+system_status_lock = threading.Lock()
+
+
+def load_system_status():
+    """
+    Return the current status snapshot: {'version', 'data', 'collectedAt',
+    'lastModified', 'bodies'}, or None if the file was never read successfully.
+    """
+    version, last_modified = file_version(SYSTEM_STATUS_FILE)
+    with system_status_lock:
+        snapshot = system_status_snapshot['current']
+        if snapshot is not None and snapshot['version'] == version:
+            return snapshot
+        if version == '-':
+            return snapshot
+
+        try:
+            data = json.loads(SYSTEM_STATUS_FILE.read_bytes())
+            if not isinstance(data, dict):
+                raise ValueError('not an object')
+        except (OSError, ValueError):
+            return snapshot  # retried on the next call
+
+        try:
+            collected_at = datetime.fromisoformat(data['timestamp'].replace('Z', '+00:00')).timestamp()
+        except (KeyError, AttributeError, ValueError):
+            collected_at = last_modified.timestamp()
+
+        snapshot = system_status_snapshot['current'] = {
+            'version': version,
+            'data': data,
+            'collectedAt': collected_at,
+            'lastModified': last_modified,
+            'bodies': {}
+        }
+        return snapshot
+
+
+def system_status_body(snapshot, stale=False):
+    """Compact JSON bytes of a snapshot with its `stale` flag, encoded once per variant."""
+    body = snapshot['bodies'].get(stale)
+    if body is None:
+        body = json.dumps(dict(snapshot['data'], stale=stale), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        snapshot['bodies'][stale] = body
+    return body
+
+
 @app.route('/api/system/status', methods=['GET'])
 def get_system_status():
     """
     Get system status (CPU, RAM, disks, services).
-    Data is written by a host-side cron script to avoid container limitations.
+    Data is written by a host-side collector (scripts/codeglyph-monitor.py) to avoid container limitations.
+    `stale` is set once the data is older than SYSTEM_STATUS_STALE_AFTER seconds
+    (X-Status-Age gives its age).
     """
-    try:
-        if not SYSTEM_STATUS_FILE.exists():
-            return jsonify({
-                'error': 'Donnees systeme non disponibles',
-                'cpu': 0,
-                'ram': 0,
-                'disks': [],
-                'services': [],
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            }), 503
-
-        with open(SYSTEM_STATUS_FILE, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        return jsonify(data)
-
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Format de donnees invalide'}), 500
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    snapshot = load_system_status()
+    if snapshot is None:
+        if SYSTEM_STATUS_FILE.exists():
+            return jsonify({'error': 'Format de donnees invalide'}), 500
+        return jsonify({
+            'error': 'Donnees systeme non disponibles',
+            'cpu': 0,
+            'ram': 0,
+            'disks': [],
+            'services': [],
+            'timestamp': datetime.utcnow().isoformat() + 'Z'
+        }), 503
+
+    age = max(time.time() - snapshot['collectedAt'], 0)
+    stale = age > SYSTEM_STATUS_STALE_AFTER
+    etag = make_etag('system-status', snapshot['version'], stale)
+    response = not_modified(etag, snapshot['lastModified'])
+    if response is None:
+        response = with_validators(
+            Response(system_status_body(snapshot, stale), mimetype='application/json'),
+            etag, snapshot['lastModified']
+        )
+    response.headers['X-Status-Age'] = str(int(age))
+    return response
 
 
 def read_system_status():
-    """Read current system status from file (helper for SSE)."""
+    """Return the current system status data (cached, see load_system_status), or None."""
+    snapshot = load_system_status()
+    return snapshot['data'] if snapshot is not None else None
+
+
+# SSE endpoint removed - Flask/gevent SSE causes high CPU usage, and on the
+# gthread workers every open stream would hold one of the few threads.
+# Browsers poll /api/system/status, which costs a stat() and a 304 when the
+# file is unchanged. A single watcher thread follows SYSTEM_STATUS_FILE
+# (inotify on its directory, since the collector replaces the file by rename,
+# or stat() polling when inotify is unavailable) to feed the metrics history
+# with each new snapshot.
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def open_inotify(directory, mask):
+    """Return an inotify fd watching `directory`, or None if inotify is unavailable."""
     try:
-        if SYSTEM_STATUS_FILE.exists():
-            with open(SYSTEM_STATUS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        pass
-    return None
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
 
 
-# SSE endpoint removed - Flask/gevent SSE causes high CPU usage
-# Using optimized polling instead (30s interval in frontend)
+def inotify_names(fd):
+    """Drain pending inotify events and return the file names they concern."""
+    names = set()
+    try:
+        data = os.read(fd, 65536)
+    except BlockingIOError:
+        return names
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        offset += INOTIFY_EVENT.size
+        names.add(data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'replace'))
+        offset += length
+    return names
+
+
+class SystemStatusWatcher:
+    """
+    Reloads the SYSTEM_STATUS_FILE snapshot from a single background thread
+    when the file changes, and appends each new one to the metrics history.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.thread = None
+        self.mode = None  # 'inotify' or 'polling'
+
+    def start(self):
+        """Load the current status and start the watcher thread (once)."""
+        with self.lock:
+            if self.thread is None:
+                self.reload()
+                self.thread = threading.Thread(target=self.run, name='system-status-watcher', daemon=True)
+                self.thread.start()
+
+    def reload(self):
+        """Record the status snapshot in the history if it changed."""
+        snapshot = load_system_status()
+        if snapshot is None or snapshot['version'] == self.version:
+            return  # missing or half-written: keep the last good snapshot
+        self.version = snapshot['version']
+
+        if SYSTEM_HISTORY_ENABLED:
+            system_history.ingest(snapshot['data'])
+
+    def run(self):
+        SYSTEM_STATUS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd = open_inotify(SYSTEM_STATUS_FILE.parent, IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+        self.mode = 'polling' if fd is None else 'inotify'
+
+        while True:
+            try:
+                if fd is None:
+                    time.sleep(SYSTEM_STATUS_POLL_INTERVAL)
+                    self.reload()
+                    if SYSTEM_HISTORY_ENABLED:
+                        system_history.save_if_due()
+                    continue
+
+                # The timeout is a safety net for missed events (e.g. directory replaced)
+                ready, _, _ = select.select([fd], [], [], 60)
+                if not ready or SYSTEM_STATUS_FILE.name in inotify_names(fd):
+                    self.reload()
+                if SYSTEM_HISTORY_ENABLED:
+                    system_history.save_if_due()
+            except Exception as e:
+                print(f"System status watcher error: {e}")
+                time.sleep(SYSTEM_STATUS_POLL_INTERVAL)
+
+
+system_status_watcher = SystemStatusWatcher()
+
+
+# ============================================================================
+# SYSTEM METRICS HISTORY
+# ============================================================================
+# Each new status snapshot (one per collector run, every ~5s) is appended to
+# fixed-size ring buffers: raw samples, then 1-minute and 1-hour min/avg/max
+# buckets, each level downsampled from the one below it. Rings are flat
+# arrays (float64 timestamps, float32 values) and the binary file under
+# DATA_DIR mirrors them, so memory and disk use do not grow with uptime.
+# Only the process holding the history lock ingests and saves; other
+# workers reload the file when it changes.
+
+SYSTEM_HISTORY_MAX_DISKS = 6
+SYSTEM_HISTORY_SERIES = ['cpu', 'ram'] + [f'disk{i}' for i in range(SYSTEM_HISTORY_MAX_DISKS)]
+# (resolution, step in seconds, capacity): 1 hour of raw samples, 48 hours
+# of minutes, 90 days of hours
+SYSTEM_HISTORY_LEVELS = [('raw', 5, 720), ('1m', 60, 2880), ('1h', 3600, 2160)]
+SYSTEM_HISTORY_MAGIC = b'CGM1'
+SYSTEM_HISTORY_RANGE_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def little_endian_bytes(values):
+    """Return the bytes of an array in little-endian order."""
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def array_from_le_bytes(typecode, data):
+    """Inverse of little_endian_bytes()."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+class MetricRing:
+    """
+    Fixed-capacity ring of rows: a timestamp and `width` float values (one
+    per series for raw samples, min/avg/max per series for buckets).
+    """
+
+    def __init__(self, capacity, width):
+        self.capacity = capacity
+        self.width = width
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('f', bytes(4 * capacity * width))
+        self.start = 0
+        self.count = 0
+
+    def append(self, timestamp, row):
+        index = (self.start + self.count) % self.capacity
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.count += 1
+        self.times[index] = timestamp
+        self.values[index * self.width:(index + 1) * self.width] = array('f', row)
+
+    def rows(self, since):
+        """Yield (timestamp, values) of the rows at or after `since`, oldest first."""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[(self.start + mid) % self.capacity] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        for position in range(lo, self.count):
+            index = (self.start + position) % self.capacity
+            yield self.times[index], self.values[index * self.width:(index + 1) * self.width]
+
+
+def snapshot_metrics(data):
+    """Return (timestamp, values) of a status snapshot, NaN for missing series."""
+    try:
+        timestamp = datetime.fromisoformat(data['timestamp'].replace('Z', '+00:00')).timestamp()
+    except (KeyError, AttributeError, ValueError):
+        timestamp = time.time()
+
+    def number(value):
+        return float(value) if isinstance(value, (int, float)) else math.nan
+
+    disks = [number(disk.get('percent')) for disk in data.get('disks') or [] if isinstance(disk, dict)]
+    disks = (disks + [math.nan] * SYSTEM_HISTORY_MAX_DISKS)[:SYSTEM_HISTORY_MAX_DISKS]
+    return timestamp, [number(data.get('cpu')), number(data.get('ram'))] + disks
+
+
+class SystemHistory:
+    """Multi-resolution metrics history (see SYSTEM_HISTORY_LEVELS)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.writer = None  # flock'd file while this process is the writer
+        self.seq = 0  # bumped on every change, for ETags
+        self.dirty = False
+        self.saved_at = 0
+        self.file_version = None
+        self._reset()
+
+    def _reset(self):
+        series = len(SYSTEM_HISTORY_SERIES)
+        self.rings = [MetricRing(capacity, series if level == 0 else 3 * series)
+                      for level, (_, _, capacity) in enumerate(SYSTEM_HISTORY_LEVELS)]
+        # Bucket being filled per aggregate level: [start, counts, mins, sums, maxs]
+        self.pending = [None] * len(SYSTEM_HISTORY_LEVELS)
+        self.last_sample = 0
+
+    def _is_writer(self):
+        """Take the history lock on first use: the first process to get it keeps it."""
+        if self.writer is None:
+            SYSTEM_HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+            lock_file = open(SYSTEM_HISTORY_FILE.with_suffix('.lock'), 'a')
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self.writer = lock_file
+            except OSError:
+                lock_file.close()
+                self.writer = False
+        return bool(self.writer)
+
+    def _accumulate(self, level, timestamp, stats):
+        """Add per-series (min, sum, max, count) to the open bucket of a level, closing it first if done."""
+        step = SYSTEM_HISTORY_LEVELS[level][1]
+        bucket = timestamp - timestamp % step
+        pending = self.pending[level]
+
+        if pending is not None and pending[0] != bucket:
+            start, counts, mins, sums, maxs = pending
+            row = []
+            for i in range(len(counts)):
+                if counts[i]:
+                    row += [mins[i], sums[i] / counts[i], maxs[i]]
+                else:
+                    row += [math.nan] * 3
+            self.rings[level].append(start, row)
+            if level + 1 < len(SYSTEM_HISTORY_LEVELS):
+                self._accumulate(level + 1, start, list(zip(mins, sums, maxs, counts)))
+            pending = None
+
+        if pending is None:
+            series = len(stats)
+            pending = self.pending[level] = [bucket, [0] * series, [math.inf] * series, [0.0] * series, [-math.inf] * series]
+
+        _, counts, mins, sums, maxs = pending
+        for i, (low, total, high, count) in enumerate(stats):
+            if count:
+                counts[i] += count
+                sums[i] += total
+                mins[i] = min(mins[i], low)
+                maxs[i] = max(maxs[i], high)
+
+    def ingest(self, data):
+        """Append a status snapshot (ignored if not newer than the last one or not the writer)."""
+        timestamp, values = snapshot_metrics(data)
+        with self.lock:
+            if not self._is_writer():
+                return
+            self._load()
+            if timestamp <= self.last_sample:
+                return
+            self.last_sample = timestamp
+            self.rings[0].append(timestamp, values)
+            self._accumulate(1, timestamp, [(v, v, v, 0 if math.isnan(v) else 1) for v in values])
+            self.seq += 1
+            self.dirty = True
+
+    def save_if_due(self):
+        with self.lock:
+            if self.dirty and time.monotonic() - self.saved_at >= SYSTEM_HISTORY_SAVE_INTERVAL:
+                self.save()
+
+    def save(self):
+        """Write the rings and open buckets to SYSTEM_HISTORY_FILE (caller holds the lock)."""
+        parts = [SYSTEM_HISTORY_MAGIC, struct.pack('<IId', len(SYSTEM_HISTORY_SERIES), len(self.rings), self.last_sample)]
+        for ring, pending in zip(self.rings, self.pending):
+            parts.append(struct.pack('<IIII', ring.capacity, ring.width, ring.start, ring.count))
+            parts.append(little_endian_bytes(ring.times))
+            parts.append(little_endian_bytes(ring.values))
+            if pending is None:
+                parts.append(struct.pack('<?', False))
+            else:
+                start, counts, mins, sums, maxs = pending
+                parts.append(struct.pack('<?d', True, start))
+                for values in (counts, mins, sums, maxs):
+                    parts.append(little_endian_bytes(array('d', values)))
+
+        tmp_path = SYSTEM_HISTORY_FILE.with_name(f'.{SYSTEM_HISTORY_FILE.name}.{os.getpid()}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(parts))
+            os.replace(tmp_path, SYSTEM_HISTORY_FILE)
+        except OSError as e:
+            print(f"System history save error: {e}")
+            return
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        self.file_version = file_version(SYSTEM_HISTORY_FILE)[0]
+
+    def _load(self):
+        """
+        Read SYSTEM_HISTORY_FILE on first use, and again in non-writer
+        processes whenever it changed. A file written for other series or
+        level sizes is ignored.
+        """
+        if self.loaded and self.writer:
+            return
+        version = file_version(SYSTEM_HISTORY_FILE)[0]
+        if self.loaded and version == self.file_version:
+            return
+        self.loaded = True
+        self.file_version = version
+        if version == '-':
+            return
+
+        try:
+            data = SYSTEM_HISTORY_FILE.read_bytes()
+            if data[:4] != SYSTEM_HISTORY_MAGIC:
+                raise ValueError('bad magic')
+            series, levels, last_sample = struct.unpack_from('<IId', data, 4)
+            if series != len(SYSTEM_HISTORY_SERIES) or levels != len(SYSTEM_HISTORY_LEVELS):
+                raise ValueError('layout changed')
+            offset = 4 + struct.calcsize('<IId')
+
+            rings, pending = [], []
+            for level, (_, _, capacity) in enumerate(SYSTEM_HISTORY_LEVELS):
+                ring = MetricRing(capacity, series if level == 0 else 3 * series)
+                stored_capacity, width, ring.start, ring.count = struct.unpack_from('<IIII', data, offset)
+                if (stored_capacity, width) != (ring.capacity, ring.width):
+                    raise ValueError('layout changed')
+                offset += 16
+                ring.times = array_from_le_bytes('d', data[offset:offset + 8 * capacity])
+                offset += 8 * capacity
+                ring.values = array_from_le_bytes('f', data[offset:offset + 4 * capacity * width])
+                offset += 4 * capacity * width
+                rings.append(ring)
+
+                (has_pending,) = struct.unpack_from('<?', data, offset)
+                offset += 1
+                if not has_pending:
+                    pending.append(None)
+                    continue
+                (start,) = struct.unpack_from('<d', data, offset)
+                offset += 8
+                columns = []
+                for _ in range(4):
+                    columns.append(list(array_from_le_bytes('d', data[offset:offset + 8 * series])))
+                    offset += 8 * series
+                columns[0] = [int(count) for count in columns[0]]
+                pending.append([start] + columns)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"System history not loaded: {e}")
+            return
+
+        self.rings, self.pending, self.last_sample = rings, pending, last_sample
+        self.seq += 1
+
+    def version(self):
+        with self.lock:
+            self._load()
+            return self.seq
+
+    def query(self, seconds, level):
+        """
+        Return the rows of a level over the last `seconds` as the API payload,
+        the bucket being filled included as the last point.
+        """
+        resolution, step, _ = SYSTEM_HISTORY_LEVELS[level]
+        since = time.time() - seconds
+        series_count = len(SYSTEM_HISTORY_SERIES)
+
+        with self.lock:
+            self._load()
+            rows = [(timestamp, list(values)) for timestamp, values in self.rings[level].rows(since)]
+            pending = self.pending[level]
+            if pending is not None and pending[0] >= since:
+                start, counts, mins, sums, maxs = pending
+                row = []
+                for i in range(series_count):
+                    row += [mins[i], sums[i] / counts[i], maxs[i]] if counts[i] else [math.nan] * 3
+                rows.append((start, row))
+
+        def column(i):
+            return [None if math.isnan(values[i]) else round(values[i], 2) for _, values in rows]
+
+        series = {}
+        for i, name in enumerate(SYSTEM_HISTORY_SERIES):
+            if level == 0:
+                values = {'avg': column(i)}
+            else:
+                values = {'min': column(3 * i), 'avg': column(3 * i + 1), 'max': column(3 * i + 2)}
+            if any(value is not None for value in values['avg']):
+                series[name] = values
+
+        return {
+            'resolution': resolution,
+            'step': step,
+            'range': seconds,
+            'timestamps': [int(timestamp) for timestamp, _ in rows],
+            'series': series
+        }
+
+
+system_history = SystemHistory()
+
+
+def parse_history_range(value):
+    """Parse `range` (seconds, or a number with s/m/h/d). Raises ValueError."""
+    match = re.fullmatch(r'(\d+)([smhd]?)', value or '')
+    if not match or int(match.group(1)) <= 0:
+        raise ValueError(value)
+    return int(match.group(1)) * SYSTEM_HISTORY_RANGE_UNITS[match.group(2) or 's']
+
+
+@app.route('/api/system/history', methods=['GET'])
+def get_system_history():
+    """
+    CPU, RAM and disk usage history.
+
+    Query params:
+    - range: how far back, in seconds or with a unit: 30m, 6h, 7d (default 1h)
+    - resolution: raw, 1m or 1h (default: the finest one keeping the whole range)
+    Raw samples only have `avg`; 1m and 1h buckets have min/avg/max.
+    """
+    if not SYSTEM_HISTORY_ENABLED:
+        return jsonify({'error': 'Historique systeme desactive'}), 404
+
+    try:
+        seconds = parse_history_range(request.args.get('range', '1h'))
+    except ValueError:
+        return jsonify({'error': 'Parametre range invalide (ex: 30m, 6h, 7d)'}), 400
+
+    resolutions = [name for name, _, _ in SYSTEM_HISTORY_LEVELS]
+    resolution = request.args.get('resolution')
+    if resolution is None:
+        level = next((level for level, (_, step, capacity) in enumerate(SYSTEM_HISTORY_LEVELS)
+                      if step * capacity >= seconds), len(SYSTEM_HISTORY_LEVELS) - 1)
+    elif resolution in resolutions:
+        level = resolutions.index(resolution)
+    else:
+        return jsonify({'error': 'Resolution invalide (raw, 1m ou 1h)'}), 400
+
+    # The window start moves with time: part of the version, at the level's step
+    step = SYSTEM_HISTORY_LEVELS[level][1]
+    etag = make_etag('system-history', system_history.version(), seconds, level, int(time.time() // step))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
+    return with_validators(jsonify(system_history.query(seconds, level)), etag)
+
+
+@atexit.register
+def save_system_history():
+    with system_history.lock:
+        if system_history.dirty:
+            system_history.save()
+
+
+if SYSTEM_HISTORY_ENABLED:
+    system_status_watcher.start()
 
 # ============================================================================
 # HEALTH CHECK
@@ -1211,7 +4233,16 @@ def read_system_status():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'ok', 'timestamp': datetime.utcnow().isoformat()})
+    with heatmap_warmer_lock:
+        heatmap_warmup = dict(heatmap_warmer_state)
+    with heatmap_flights.lock:
+        heatmap_warmup['singleFlight'] = dict(heatmap_flights.stats)
+    return jsonify({
+        'status': 'ok',
+        'timestamp': datetime.utcnow().isoformat(),
+        'heatmapCache': heatmap_warmup,
+        'systemStatusWatcher': system_status_watcher.mode
+    })
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=4000, debug=True)
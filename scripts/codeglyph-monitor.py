@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# CodeGlyph System Monitor
+# Ecrit les metriques systeme dans un fichier JSON pour l'API
+#
+# Processus permanent (pas de fork par mesure) : lit /proc et statvfs
+# directement, calcule le CPU entre deux mesures, interroge systemd en un seul
+# appel et Docker en une seule requete sur son socket unix.
+#
+# Installation:
+#   sudo cp scripts/codeglyph-monitor.py /usr/local/bin/
+#   sudo chmod +x /usr/local/bin/codeglyph-monitor.py
+#   sudo cp scripts/codeglyph-monitor.service /etc/systemd/system/
+#   sudo systemctl daemon-reload
+#   sudo systemctl enable --now codeglyph-monitor.service
+#
+# Verification:
+#   systemctl status codeglyph-monitor.service
+#   codeglyph-monitor.py --once --output /tmp/status.json && cat /tmp/status.json
+
+import argparse
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+OUTPUT_FILE = "/home/erickdesmet/Docker_apps/codeglyph/data/system-status.json"
+INTERVAL = 5  # secondes entre deux mesures
+FIRST_SAMPLE_DELAY = 0.5  # premiere mesure CPU apres (re)demarrage, comme l'ancien script
+
+# Services systemd a monitorer
+SYSTEMD_SERVICES = [
+    "caddy.service",
+    "php8.3-fpm.service",
+    "pihole-FTL.service",
+    "fitmycv-prod.service",
+]
+
+# Processus a verifier (motifs cherches dans la ligne de commande, comme pgrep -f)
+PROCESSES = [
+    "qbittorrent-nox",
+    "tg-qb-bot/bot.py",
+]
+
+# Conteneurs Docker a ignorer (expressions regulieres)
+DOCKER_BLACKLIST = [
+    r"^dazzling_",      # Conteneur hello-world de test
+    r"n8n-extensions",  # Conteneur d'installation temporaire n8n
+]
+
+DOCKER_SOCKET = "/var/run/docker.sock"
+
+
+# ============================================================================
+# CPU / RAM / Disques
+# ============================================================================
+
+def read_cpu_times(proc_root="/proc"):
+    """Return (idle, total) jiffies from the aggregate line of /proc/stat."""
+    with open(os.path.join(proc_root, "stat"), "r") as f:
+        fields = f.readline().split()
+    # user nice system idle iowait irq softirq (same fields as the bash script)
+    values = [int(value) for value in fields[1:8]]
+    return values[3], sum(values)
+
+
+def cpu_percent(previous, current):
+    """CPU usage between two read_cpu_times() samples."""
+    idle = current[0] - previous[0]
+    total = current[1] - previous[1]
+    if total <= 0:
+        return 0
+    return 100 * (total - idle) // total
+
+
+def read_ram_percent(proc_root="/proc"):
+    """Used RAM (MemTotal - MemAvailable, as `free` reports it) in percent."""
+    meminfo = {}
+    with open(os.path.join(proc_root, "meminfo"), "r") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            meminfo[key] = int(value.split()[0])
+    total = meminfo.get("MemTotal", 0)
+    if not total:
+        return 0
+    available = meminfo.get("MemAvailable", meminfo.get("MemFree", 0))
+    return (total - available) * 100 // total
+
+
+def disk_percent(path, statvfs=os.statvfs):
+    """Used space in percent, rounded up like df."""
+    st = statvfs(path)
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    available = st.f_bavail * st.f_frsize
+    if used + available <= 0:
+        return None
+    return -(-used * 100 // (used + available))
+
+
+def read_mount_points(proc_root="/proc"):
+    """Mount points listed in /proc/self/mounts."""
+    mounts = []
+    with open(os.path.join(proc_root, "self", "mounts"), "r") as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) > 1:
+                # Spaces and tabs are escaped as octal in mounts
+                mounts.append(re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), fields[1]))
+    return mounts
+
+
+def read_disks(proc_root="/proc", statvfs=os.statvfs):
+    """Root disk, then every filesystem mounted directly under /mnt."""
+    mount_points = set(read_mount_points(proc_root))
+    paths = ["/"] + sorted(
+        path for path in mount_points
+        if path.startswith("/mnt/") and "/" not in path[len("/mnt/"):]
+    )
+
+    disks = []
+    for path in paths:
+        try:
+            percent = disk_percent(path, statvfs)
+        except OSError:
+            continue
+        if percent is not None:
+            disks.append({"percent": percent})
+    return disks
+
+
+# ============================================================================
+# Services
+# ============================================================================
+
+def systemd_states(units, run=subprocess.run):
+    """Active state of each unit, from a single `systemctl is-active` call."""
+    if not units:
+        return {}
+    try:
+        result = run(["systemctl", "is-active", *units], capture_output=True, text=True, timeout=10)
+        states = result.stdout.split()
+    except (OSError, subprocess.SubprocessError):
+        states = []
+    return {unit: i < len(states) and states[i] == "active" for i, unit in enumerate(units)}
+
+
+def running_processes(patterns, proc_root="/proc"):
+    """Which patterns match the command line of a running process (pgrep -f)."""
+    found = {pattern: False for pattern in patterns}
+    regexes = {pattern: re.compile(pattern) for pattern in patterns}
+    own_pid = str(os.getpid())
+
+    try:
+        pids = [name for name in os.listdir(proc_root) if name.isdigit() and name != own_pid]
+    except OSError:
+        return found
+
+    for pid in pids:
+        if all(found.values()):
+            break
+        try:
+            with open(os.path.join(proc_root, pid, "cmdline"), "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode("utf-8", "replace").strip()
+        except OSError:
+            continue  # process gone or not readable
+        for pattern, regex in regexes.items():
+            if not found[pattern] and regex.search(cmdline):
+                found[pattern] = True
+    return found
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP over a unix socket (Docker Engine API)."""
+
+    def __init__(self, socket_path, timeout=5):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def docker_containers(socket_path=DOCKER_SOCKET):
+    """
+    [(name, running)] of all containers, from one GET /containers/json call.
+    Returns None when Docker is not reachable.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    connection = UnixHTTPConnection(socket_path)
+    try:
+        connection.request("GET", "/containers/json?all=1")
+        response = connection.getresponse()
+        if response.status != 200:
+            return None
+        containers = json.loads(response.read())
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        connection.close()
+
+    result = []
+    for container in containers:
+        names = container.get("Names") or []
+        if names:
+            result.append((names[0].lstrip("/"), container.get("State") == "running"))
+    return result
+
+
+def read_services(proc_root="/proc", docker_socket=DOCKER_SOCKET, run=subprocess.run):
+    """Systemd services, then processes, then non-blacklisted containers."""
+    services = []
+
+    for unit, running in systemd_states(SYSTEMD_SERVICES, run).items():
+        services.append({"name": unit[:-len(".service")] if unit.endswith(".service") else unit, "running": running})
+
+    for pattern, running in running_processes(PROCESSES, proc_root).items():
+        name = os.path.basename(pattern)
+        if name.endswith(".py"):
+            name = name[:-3]
+        services.append({"name": name, "running": running})
+
+    blacklist = [re.compile(pattern) for pattern in DOCKER_BLACKLIST]
+    for name, running in docker_containers(docker_socket) or []:
+        if not any(regex.search(name) for regex in blacklist):
+            services.append({"name": name, "running": running})
+
+    return services
+
+
+# ============================================================================
+# Main
+# ============================================================================
+
+def write_status(path, status):
+    """Write the status file atomically (temp file in the same directory + rename)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2)
+            f.write("\n")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class Collector:
+    """
+    Keeps the previous CPU sample so each tick measures the interval since the
+    last one. The baseline is taken at creation: wait a moment before the first
+    collect(), or its CPU value covers next to no time.
+    """
+
+    def __init__(self, proc_root="/proc", docker_socket=DOCKER_SOCKET, statvfs=os.statvfs, run=subprocess.run):
+        self.proc_root = proc_root
+        self.docker_socket = docker_socket
+        self.statvfs = statvfs
+        self.run = run
+        self.previous_cpu = read_cpu_times(proc_root)
+
+    def collect(self):
+        cpu_times = read_cpu_times(self.proc_root)
+        cpu = cpu_percent(self.previous_cpu, cpu_times)
+        self.previous_cpu = cpu_times
+
+        return {
+            "cpu": cpu,
+            "ram": read_ram_percent(self.proc_root),
+            "disks": read_disks(self.proc_root, self.statvfs),
+            "services": read_services(self.proc_root, self.docker_socket, self.run),
+            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CodeGlyph system monitor")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="status JSON file to write")
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="seconds between samples")
+    parser.add_argument("--proc-root", default="/proc", help="procfs mount (tests: fake tree)")
+    parser.add_argument("--docker-socket", default=DOCKER_SOCKET, help="Docker Engine API unix socket")
+    parser.add_argument("--once", action="store_true", help="write a single sample and exit")
+    args = parser.parse_args(argv)
+
+    collector = Collector(args.proc_root, args.docker_socket)
+    # Not the average since boot: the first value covers a short sample
+    time.sleep(FIRST_SAMPLE_DELAY)
+    next_tick = time.monotonic()
+    while True:
+        try:
+            write_status(args.output, collector.collect())
+        except Exception as e:
+            print(f"codeglyph-monitor: {e}", file=sys.stderr)
+        if args.once:
+            return 0
+
+        # Fixed rate: sampling time doesn't shift the schedule
+        next_tick += args.interval
+        delay = next_tick - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            next_tick = time.monotonic()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 // Service cards CRUD operations
 
 import { API_BASE } from './config.js';
-import { escapeHtml } from './utils.js';
+import { escapeHtml, waitForTranslation } from './utils.js';
 import { isAdmin } from './admin.js';
 
 // DOM elements (initialized in initCardListeners)
@@ -201,14 +201,20 @@ export function initCardListeners() {
         const method = cardId ? 'PUT' : 'POST';
         const url = cardId ? `${API_BASE}/cards/${cardId}` : `${API_BASE}/cards`;
 
-        await fetch(url, {
+        const response = await fetch(url, {
             method,
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(cardData)
         });
+        const savedCard = await response.json();
 
         modal.classList.remove('active');
         loadCards();
+
+        // The other language is translated in the background
+        if (savedCard.translationStatus === 'pending') {
+            waitForTranslation(`${API_BASE}/cards/${savedCard.id}`).then(loadCards);
+        }
     });
 
     // Delete button
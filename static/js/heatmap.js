@@ -9,6 +9,12 @@ let currentHeatmapData = null;
 let currentView = 'week'; // Default to week view (GitHub style)
 export let reposData = {}; // Store description and URL for tooltip
 let globalHeatmapLoaded = false; // Track if global heatmap was loaded for non-admin
+let currentTarget = null; // 'global' or the repo id shown
+let heatmapLoads = 0; // Incremented per load, so late responses of an older one are dropped
+
+// The last HEATMAP_WINDOW_DAYS are fetched and rendered first, the older
+// history afterwards. The week view only needs daily totals.
+const HEATMAP_WINDOW_DAYS = 365;
 
 // Helper function to format date in local timezone (avoids toISOString() UTC conversion)
 function formatLocalDate(date) {
@@ -18,6 +24,120 @@ function formatLocalDate(date) {
     return `${year}-${month}-${day}`;
 }
 
+// Expand the compact `packed` payload (dense little-endian counts, 24 per day,
+// or one per day/week/month period) back into the {"YYYY-MM-DD-HH": count} /
+// {"YYYY-MM-DD": count} / {"YYYY-MM": count} maps used by the renderers
+function unpackHeatmap(data) {
+    if (!data.packed) return data;
+
+    const { packed, ...rest } = data;
+    const commits = {};
+
+    if (packed.baseDate) {
+        const bytes = Uint8Array.from(atob(packed.data), c => c.charCodeAt(0));
+        const view = new DataView(bytes.buffer);
+        const [year, month, day] = packed.baseDate.split('-').map(Number);
+        const countAt = (index) => {
+            const offset = index * packed.width;
+            return packed.width === 1 ? view.getUint8(offset)
+                : packed.width === 2 ? view.getUint16(offset, true)
+                : view.getUint32(offset, true);
+        };
+
+        if (!packed.resolution) {
+            for (let d = 0; d < packed.days; d++) {
+                let dateStr = null;
+                for (let hour = 0; hour < 24; hour++) {
+                    const count = countAt(d * 24 + hour);
+                    if (!count) continue;
+                    if (!dateStr) dateStr = formatLocalDate(new Date(year, month - 1, day + d));
+                    commits[`${dateStr}-${hour.toString().padStart(2, '0')}`] = count;
+                }
+            }
+        } else {
+            for (let p = 0; p < packed.periods; p++) {
+                const count = countAt(p);
+                if (!count) continue;
+                if (packed.resolution === 'month') {
+                    commits[formatLocalDate(new Date(year, month - 1 + p, 1)).substring(0, 7)] = count;
+                } else {
+                    const step = packed.resolution === 'week' ? 7 : 1;
+                    commits[formatLocalDate(new Date(year, month - 1, day + p * step))] = count;
+                }
+            }
+        }
+    }
+
+    return { ...rest, commits };
+}
+
+function viewResolution(view) {
+    return view === 'week' ? 'day' : 'hour';
+}
+
+async function fetchHeatmap(target, params) {
+    const endpoint = target === 'global'
+        ? `${API_BASE}/git/heatmap/global`
+        : `${API_BASE}/git/heatmap/${target}`;
+    const query = new URLSearchParams({ format: 'packed', ...params });
+    const response = await fetch(`${endpoint}?${query}`);
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    return unpackHeatmap(await response.json());
+}
+
+// Load and render a heatmap at the resolution of the current view: the
+// recent window first, then (without blocking the caller) the older history
+async function loadHeatmap(target) {
+    const load = ++heatmapLoads;
+    const resolution = viewResolution(currentView);
+    currentTarget = target;
+
+    const today = new Date();
+    const windowStart = new Date(today);
+    windowStart.setDate(windowStart.getDate() - HEATMAP_WINDOW_DAYS);
+    const since = formatLocalDate(windowStart);
+
+    const recent = await fetchHeatmap(target, { resolution, since, until: formatLocalDate(today) });
+    if (load !== heatmapLoads) return;
+    currentHeatmapData = recent;
+    renderCurrentView();
+
+    if (!recent.firstDate || recent.firstDate >= since) return;
+
+    windowStart.setDate(windowStart.getDate() - 1);
+    fetchHeatmap(target, { resolution, until: formatLocalDate(windowStart) })
+        .then(older => {
+            if (load !== heatmapLoads) return;
+            currentHeatmapData = {
+                ...recent,
+                sinceDate: older.sinceDate,
+                commits: { ...older.commits, ...recent.commits }
+            };
+            renderCurrentView();
+        })
+        .catch(error => console.error('Error loading heatmap history:', error));
+}
+
+// Switch view, reloading the heatmap when the view needs another resolution
+async function switchView(view) {
+    currentView = view;
+    if (!currentHeatmapData) return;
+    if ((currentHeatmapData.resolution || 'hour') === viewResolution(view)) {
+        renderCurrentView();
+        return;
+    }
+
+    const loading = document.getElementById('heatmap-loading');
+    if (loading) loading.style.display = 'block';
+    try {
+        await loadHeatmap(currentTarget);
+    } catch (error) {
+        console.error('Error loading heatmap:', error);
+    } finally {
+        if (loading) loading.style.display = 'none';
+    }
+}
+
 // Expose for external access
 export function getCurrentHeatmapData() {
     return currentHeatmapData;
@@ -37,9 +157,7 @@ export async function loadGlobalHeatmap() {
     if (container) container.style.display = 'none';
 
     try {
-        const response = await fetch(`${API_BASE}/git/heatmap/global`);
-        currentHeatmapData = await response.json();
-        renderCurrentView();
+        await loadHeatmap('global');
         if (container) container.style.display = 'block';
         if (viewToggle) viewToggle.style.display = 'flex';
         globalHeatmapLoaded = true;
@@ -110,29 +228,32 @@ export function renderStats(data) {
     const statsDiv = document.getElementById('heatmap-stats');
     if (!statsDiv) return;
 
+    // Windowed responses: show the statistics of the whole history
+    const stats = data.totalStats || data.stats;
+
     statsDiv.innerHTML = `
         <div class="stat-card">
-            <div class="stat-value">${data.stats.totalCommits}</div>
+            <div class="stat-value">${stats.totalCommits}</div>
             <div class="stat-label">${I18n.t('stats.totalCommits')}</div>
         </div>
         <div class="stat-card">
-            <div class="stat-value">${data.stats.uniqueDays}</div>
+            <div class="stat-value">${stats.uniqueDays}</div>
             <div class="stat-label">${I18n.t('stats.activeDays')}</div>
         </div>
         <div class="stat-card">
-            <div class="stat-value">${data.stats.peakHour}h</div>
+            <div class="stat-value">${stats.peakHour}h</div>
             <div class="stat-label">${I18n.t('stats.peakHour')}</div>
         </div>
         <div class="stat-card">
-            <div class="stat-value">${data.stats.currentStreak || 0}</div>
+            <div class="stat-value">${stats.currentStreak || 0}</div>
             <div class="stat-label">${I18n.t('stats.currentStreak')}</div>
         </div>
         <div class="stat-card">
-            <div class="stat-value">${data.stats.busiestDay || '-'}</div>
+            <div class="stat-value">${stats.busiestDay || '-'}</div>
             <div class="stat-label">${I18n.t('stats.favoriteDay')}</div>
         </div>
         <div class="stat-card">
-            <div class="stat-value">${data.stats.avgCommitsPerDay || 0}</div>
+            <div class="stat-value">${stats.avgCommitsPerDay || 0}</div>
             <div class="stat-label">${I18n.t('stats.avgPerDay')}</div>
         </div>
     `;
@@ -394,10 +515,7 @@ export function initHeatmapListeners() {
     setDayViewSwitchCallback(() => {
         document.querySelectorAll('.view-btn').forEach(b => b.classList.remove('active'));
         document.querySelector('.view-btn[data-view="day"]').classList.add('active');
-        currentView = 'day';
-        if (currentHeatmapData) {
-            renderCurrentView();
-        }
+        switchView('day');
     });
 
     // Listen for admin state changes to reload repos/heatmap
@@ -440,13 +558,7 @@ export function initHeatmapListeners() {
             container.style.display = 'none';
 
             try {
-                // Use global endpoint for "global" option
-                const endpoint = repoId === 'global'
-                    ? `${API_BASE}/git/heatmap/global`
-                    : `${API_BASE}/git/heatmap/${repoId}`;
-                const response = await fetch(endpoint);
-                currentHeatmapData = await response.json();
-                renderCurrentView();
+                await loadHeatmap(repoId);
                 container.style.display = 'block';
                 viewToggle.style.display = 'flex';
             } catch (error) {
@@ -471,10 +583,7 @@ export function initHeatmapListeners() {
 
             document.querySelectorAll('.view-btn').forEach(b => b.classList.remove('active'));
             btn.classList.add('active');
-            currentView = view;
-            if (currentHeatmapData) {
-                renderCurrentView();
-            }
+            switchView(view);
         });
     });
 }
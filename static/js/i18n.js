@@ -23,7 +23,9 @@ const I18n = {
      */
     async loadTranslations(lang) {
         try {
-            const response = await fetch(`/i18n/${lang}.json?v=${Date.now()}`);
+            // Content-hashed URL injected by the server (immutable cache), plain URL otherwise
+            const version = window.ASSET_VERSIONS?.[`i18n/${lang}.json`];
+            const response = await fetch(version ? `/i18n/${lang}.json?v=${version}` : `/i18n/${lang}.json`);
             if (!response.ok) throw new Error(`HTTP ${response.status}`);
             this.translations = await response.json();
         } catch (error) {
@@ -3,7 +3,8 @@
 import { API_BASE, FIXED_SERVICES_COUNT } from './config.js';
 import { isAdmin } from './admin.js';
 
-const MONITOR_REFRESH_INTERVAL = 5000; // 5 seconds
+const MONITOR_REFRESH_INTERVAL = 5000; // 5 seconds (an unchanged status is a 304)
+const MONITOR_STALE_AFTER = 30000; // Data older than this is shown as stale (as on the server)
 
 // Custom tooltip for service dots (mobile support)
 let serviceTooltipElement = null;
@@ -66,17 +67,21 @@ export async function loadSystemStatus() {
             return;
         }
 
-        updateGauge('cpu-gauge', data.cpu || 0);
-        updateGauge('ram-gauge', data.ram || 0);
-        renderDiskBars(data.disks || []);
-        renderServiceMatrix(data.services || []);
-        updateMonitorTimestamp(data.timestamp);
+        renderSystemStatus(data);
 
     } catch (error) {
         console.error('Error loading system status:', error);
     }
 }
 
+function renderSystemStatus(data) {
+    updateGauge('cpu-gauge', data.cpu || 0);
+    updateGauge('ram-gauge', data.ram || 0);
+    renderDiskBars(data.disks || []);
+    renderServiceMatrix(data.services || []);
+    updateMonitorTimestamp(data.timestamp, data.stale);
+}
+
 export function updateGauge(gaugeId, percent) {
     const gauge = document.getElementById(gaugeId);
     if (!gauge) return;
@@ -223,17 +228,24 @@ export function renderServiceMatrix(services) {
     }
 }
 
-export function updateMonitorTimestamp(timestamp) {
+let staleTimer = null;
+
+export function updateMonitorTimestamp(timestamp, stale = false) {
     const el = document.getElementById('monitor-updated');
     if (!el || !timestamp) return;
 
     const date = new Date(timestamp);
     const timeStr = date.toLocaleTimeString('fr-FR', { hour: '2-digit', minute: '2-digit', second: '2-digit' });
     el.textContent = `Maj: ${timeStr}`;
+    el.classList.toggle('stale', stale);
+
+    // Failed polls leave the last data on screen: flag it client-side too
+    clearTimeout(staleTimer);
+    const remaining = MONITOR_STALE_AFTER - (Date.now() - date.getTime());
+    staleTimer = setTimeout(() => el.classList.add('stale'), Math.max(remaining, 0));
 }
 
 export function startMonitoring() {
     loadSystemStatus();
-    // Polling every 30 seconds instead of 5 (6x less requests)
     setInterval(loadSystemStatus, MONITOR_REFRESH_INTERVAL);
 }
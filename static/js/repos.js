@@ -1,7 +1,7 @@
 // Repository management
 
 import { API_BASE } from './config.js';
-import { escapeHtml } from './utils.js';
+import { escapeHtml, waitForTranslation } from './utils.js';
 import { reposData } from './heatmap.js';
 import { isAdmin } from './admin.js';
 
@@ -284,12 +284,21 @@ export async function saveRepoDescription(repoId, description) {
         const updatedRepo = await response.json();
 
         // Update cache with bilingual description
-        if (reposData[repoId]) {
-            reposData[repoId].description = updatedRepo.description || '';
-        }
-        const select = document.getElementById('repo-select');
-        if (select && select.value === repoId) {
-            updateInfoButton(repoId);
+        const applyDescription = (repo) => {
+            if (repo && reposData[repoId]) {
+                reposData[repoId].description = repo.description || '';
+            }
+            const select = document.getElementById('repo-select');
+            if (select && select.value === repoId) {
+                updateInfoButton(repoId);
+            }
+        };
+        applyDescription(updatedRepo);
+
+        // The other language is translated in the background
+        if (updatedRepo.translationStatus === 'pending') {
+            waitForTranslation(`${API_BASE}/git/repos`, (data) => data.repos.find(r => r.id === repoId))
+                .then(applyDescription);
         }
     } catch (error) {
         console.error('Error saving description:', error);
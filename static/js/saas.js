@@ -1,7 +1,7 @@
 // SaaS cards CRUD operations
 
 import { API_BASE } from './config.js';
-import { escapeHtml } from './utils.js';
+import { escapeHtml, waitForTranslation } from './utils.js';
 import { isAdmin } from './admin.js';
 
 // DOM elements (initialized in initSaasListeners)
@@ -208,14 +208,20 @@ export function initSaasListeners() {
         const method = saasId ? 'PUT' : 'POST';
         const url = saasId ? `${API_BASE}/saas/${saasId}` : `${API_BASE}/saas`;
 
-        await fetch(url, {
+        const response = await fetch(url, {
             method,
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify(saasData)
         });
+        const savedSaas = await response.json();
 
         saasModal.classList.remove('active');
         loadSaas();
+
+        // The other language is translated in the background
+        if (savedSaas.translationStatus === 'pending') {
+            waitForTranslation(`${API_BASE}/saas/${savedSaas.id}`).then(loadSaas);
+        }
     });
 
     // Delete button
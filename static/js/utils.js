@@ -13,3 +13,23 @@ export function getMonthNames() {
 export function getDayNames() {
     return I18n.t('days') || ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'];
 }
+
+/**
+ * Poll an entity until its background translation is finished
+ * @param {string} url - URL returning the entity as JSON
+ * @param {function} [pick] - Extracts the entity from the response (defaults to the response itself)
+ * @returns {Promise<object|null>} - The translated entity, or null on timeout/error
+ */
+export async function waitForTranslation(url, pick = (data) => data) {
+    for (let attempt = 0; attempt < 20; attempt++) {
+        await new Promise(resolve => setTimeout(resolve, 1500));
+        try {
+            const response = await fetch(url, { cache: 'no-cache' });
+            const entity = pick(await response.json());
+            if (!entity || entity.translationStatus !== 'pending') return entity || null;
+        } catch (error) {
+            return null;
+        }
+    }
+    return null;
+}